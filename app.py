@@ -14,7 +14,7 @@ _BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # `override=True` so project `.env` wins over any stale OS-level APIFY_TOKEN.
 load_dotenv(os.path.join(_BASE_DIR, ".env"), override=True)
 
-from services.cache_store import init_db, get_cached_analysis, set_cached_analysis
+from services.cache_store import init_db, begin_batch, get_cached_analysis, set_cached_analysis
 from services.place_store import init_place_db, record_place_from_analysis, list_places, list_catalog_with_analysis
 from services.review_store import init_review_db, list_recent_reviews
 from services.job_store import init_job_db, get_job as get_job_row, list_jobs as list_job_rows
@@ -805,28 +805,34 @@ def api_analyze():
     except Exception:
         pass  # photos are optional, don't fail the whole request
 
-    # --- Step 4: Write to cache (best-effort) ---
+    # --- Step 4 + 5: cache + local "map" DB, one SQLite transaction (best-effort) ---
     try:
-        set_cached_analysis(
-            cache_key=cache_key,
-            mode=mode,
-            canonical_url=canonical_url,
-            display_name=display_name,
-            result_obj=analysis,
-        )
-    except Exception:
-        # 快取失敗不應影響主要回應
-        pass
-    # --- Step 5: Record into local "map" DB (best-effort) ---
-    try:
-        record_place_from_analysis(
-            canonical_url=canonical_url,
-            display_name=display_name,
-            analysis=analysis,
-        )
-    except Exception:
-        # 只是一個方便之後查詢的本地地圖資料庫，不影響主要回應
-        pass
+        with begin_batch() as conn:
+            try:
+                set_cached_analysis(
+                    cache_key=cache_key,
+                    mode=mode,
+                    canonical_url=canonical_url,
+                    display_name=display_name,
+                    result_obj=analysis,
+                    conn=conn,
+                )
+            except Exception:
+                # 快取失敗不應影響主要回應
+                pass
+            try:
+                record_place_from_analysis(
+                    canonical_url=canonical_url,
+                    display_name=display_name,
+                    analysis=analysis,
+                    conn=conn,
+                )
+            except Exception:
+                # 只是一個方便之後查詢的本地地圖資料庫，不影響主要回應
+                pass
+    except Exception as e:
+        # BEGIN / COMMIT 失敗時整批都沒寫入，記錄下來但不影響主要回應
+        print(f"[Cache] Failed to persist analysis batch: {e}")
 
     return jsonify(analysis)
 
@@ -219,7 +219,7 @@ def discover_xinyi_places(
     max_upserts: Optional[int] = None,
 ) -> Tuple[int, int]:
     from services.apify_client import search_places_bulk
-    from services.place_store import upsert_catalog_place
+    from services.place_store import upsert_catalog_places_bulk
     from services.url_normalizer import canonicalize
     from services.job_store import create_job, update_job
 
@@ -261,7 +261,7 @@ def discover_xinyi_places(
 
     def _upsert_items(items: List[Dict[str, object]], batch_hint: Sequence[str]) -> int:
         nonlocal new_count
-        inserted_here = 0
+        rows: List[Dict[str, object]] = []
         for it in items:
             if not isinstance(it, dict):
                 continue
@@ -296,21 +296,24 @@ def discover_xinyi_places(
                 continue
             seen_canonical.add(canonical_url)
 
-            upsert_catalog_place(
-                tag=tag,
-                canonical_url=canonical_url,
-                maps_url=str(maps_url),
-                place_id=str(place_id) if place_id else None,
-                name=str(name) if name else None,
-                address=str(address) if address else None,
-                lat=float(lat) if isinstance(lat, (int, float)) else None,
-                lng=float(lng) if isinstance(lng, (int, float)) else None,
-                google_rating=it.get("rating"),  # type: ignore[arg-type]
-                user_ratings_total=it.get("user_ratings_total"),  # type: ignore[arg-type]
-                source_query=str(it.get("source_query") or ",".join(list(batch_hint)[:3])),
+            rows.append(
+                {
+                    "canonical_url": canonical_url,
+                    "maps_url": str(maps_url),
+                    "place_id": str(place_id) if place_id else None,
+                    "name": str(name) if name else None,
+                    "address": str(address) if address else None,
+                    "lat": float(lat) if isinstance(lat, (int, float)) else None,
+                    "lng": float(lng) if isinstance(lng, (int, float)) else None,
+                    "google_rating": it.get("rating"),
+                    "user_ratings_total": it.get("user_ratings_total"),
+                    "source_query": str(it.get("source_query") or ",".join(list(batch_hint)[:3])),
+                }
             )
-            inserted_here += 1
-            new_count += 1
+
+        # One bulk write per discovery batch instead of one upsert (connection + commit) per place.
+        inserted_here = upsert_catalog_places_bulk(tag=tag, items=rows)
+        new_count += inserted_here
         return inserted_here
 
     t_start = _now()
@@ -550,7 +553,7 @@ def analyze_catalog(
     workers: int = 1,
     progress_every: float = 10.0,
 ) -> Dict[str, int]:
-    from services.cache_store import get_cached_analysis, set_cached_analysis
+    from services.cache_store import begin_batch, get_cached_analysis, set_cached_analysis
     from services.review_store import upsert_place_reviews, list_recent_reviews
     from services.job_store import create_job, update_job
     from services.place_store import list_catalog_places, record_place_from_analysis, update_catalog_analyze_status
@@ -716,13 +719,15 @@ def analyze_catalog(
             except Exception:
                 pass
 
-            with db_lock:
+            # One transaction (one commit) for the cache entry, the place row and the status.
+            with db_lock, begin_batch() as conn:
                 set_cached_analysis(
                     cache_key=cache_key,
                     mode=mode,
                     canonical_url=canonical_url,
                     display_name=display_name,
                     result_obj=analysis,
+                    conn=conn,
                 )
 
                 record_place_from_analysis(
@@ -732,6 +737,7 @@ def analyze_catalog(
                     address=address,
                     google_rating=google_rating,
                     user_ratings_total=user_ratings_total,
+                    conn=conn,
                 )
 
                 update_catalog_analyze_status(
@@ -739,6 +745,7 @@ def analyze_catalog(
                     canonical_url=canonical_url,
                     status="done",
                     error=None,
+                    conn=conn,
                 )
 
             total_s = _now() - t0
@@ -54,7 +54,7 @@ def peek_catalog(tag: str, limit: int) -> None:
                 last_analyzed_at
             FROM place_catalog
             WHERE tag = ?
-            ORDER BY datetime(last_seen_at) DESC
+            ORDER BY last_seen_at DESC
             LIMIT ?
             """,
             (tag, limit),
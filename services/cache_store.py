@@ -1,9 +1,14 @@
 import json
 import os
 import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
 
 # Optional Postgres-backed cache:
 # - If POSTGRES_URL (or DATABASE_URL) is set, we use Postgres for `analysis_cache`
@@ -52,17 +57,231 @@ def _get_db_path(db_path: Optional[str] = None) -> str:
     return db_path or DEFAULT_DB_PATH
 
 
+# 已確認為 WAL 的 DB 路徑（journal_mode 會寫入 DB 檔，每個 process 每個路徑設一次即可）
+_wal_paths: Set[str] = set()
+_wal_lock = threading.Lock()
+
+
+def _apply_pragmas(conn: sqlite3.Connection, path: str, *, read_only: bool = False) -> None:
+    """
+    每條新連線開啟時套用一次的 PRAGMA。
+
+    - journal_mode=WAL：讀取不會被寫入中的 worker 擋住（每個路徑只設一次）
+    - synchronous=NORMAL：WAL 下只在 checkpoint 時 fsync；斷電可能遺失最後幾筆交易，但不會損毀 DB
+    - temp_store / mmap_size / cache_size：暫存表放記憶體、以 mmap 讀取、每條連線最多 64MB 頁快取
+    """
+    conn.execute("PRAGMA busy_timeout=5000")
+    if not read_only:
+        if path not in _wal_paths:
+            with _wal_lock:
+                if path not in _wal_paths:
+                    try:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        _wal_paths.add(path)
+                    except sqlite3.OperationalError:
+                        # 其他連線正持有鎖時無法切換；下一條新連線再試
+                        pass
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+
+
 def _get_connection(db_path: Optional[str] = None) -> sqlite3.Connection:
     path = _get_db_path(db_path)
     # 確保資料夾存在
     os.makedirs(os.path.dirname(path), exist_ok=True)
     # timeout + busy_timeout：避免多個 worker 併發寫入時過早拋出 "database is locked"
-    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, timeout=5.0)
-    conn.execute("PRAGMA busy_timeout=5000")
+    # isolation_level=None：關閉 sqlite3 模組的隱式 BEGIN，單一語句即自動提交；
+    # 需要多語句原子性或批次寫入時，請用 _write_transaction() 明確包住。
+    conn = sqlite3.connect(
+        path,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        timeout=5.0,
+        isolation_level=None,
+    )
+    _apply_pragmas(conn, path)
     conn.row_factory = sqlite3.Row
     return conn
 
 
+@contextmanager
+def _write_transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    以 BEGIN IMMEDIATE ... COMMIT 包住一段寫入（發生例外時 ROLLBACK）。
+
+    IMMEDIATE 一開始就取得 RESERVED 鎖，避免 SHARED -> RESERVED 升級時的鎖競爭；
+    批次寫入也只需一次 commit / fsync。連線需為 _get_connection() 取得的 autocommit 連線。
+
+    連線已在交易中（例如 begin_batch() 區塊內未傳 conn 的寫入）時直接併入該交易，
+    提交與 ROLLBACK 都交給外層。
+    """
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        try:
+            conn.execute("ROLLBACK")
+        except sqlite3.Error:
+            # ROLLBACK 失敗（交易已被 SQLite 自動結束等）時仍拋出原本的例外
+            pass
+        raise
+    conn.execute("COMMIT")
+
+
+@contextmanager
+def _write_scope(
+    conn: Optional[sqlite3.Connection], db_path: Optional[str] = None
+) -> Iterator[sqlite3.Connection]:
+    """
+    寫入函式共用：有傳入 conn（begin_batch() 開好的交易）就直接沿用，交易由呼叫端提交；
+    否則取執行緒連線並以 _write_transaction() 包住這一次寫入
+    （該連線若已在 begin_batch() 的交易中，則併入該交易）。
+    """
+    if conn is not None:
+        yield conn
+        return
+    own = _get_rw_connection(db_path)
+    with _write_transaction(own):
+        yield own
+
+
+# 每個執行緒各自持有的讀寫 / 唯讀連線（sqlite3 連線不可跨執行緒共用）
+_thread_local = threading.local()
+
+
+def _close_connections(conns: Dict[Tuple[str, str], sqlite3.Connection]) -> None:
+    for conn in conns.values():
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    conns.clear()
+
+
+class _ThreadConnections:
+    """
+    一個執行緒的連線快取：{("rw" | "ro", db_path): Connection}。
+
+    執行緒結束時 threading.local 釋放這個物件，weakref.finalize 隨即關閉其中的連線
+    （process 結束時也會觸發），不必等 GC 回收各個 Connection。
+    """
+
+    __slots__ = ("conns", "__weakref__")
+
+    def __init__(self) -> None:
+        self.conns: Dict[Tuple[str, str], sqlite3.Connection] = {}
+        weakref.finalize(self, _close_connections, self.conns)
+
+
+def _thread_connections() -> Dict[Tuple[str, str], sqlite3.Connection]:
+    holder: Optional[_ThreadConnections] = getattr(_thread_local, "holder", None)
+    if holder is None:
+        holder = _ThreadConnections()
+        _thread_local.holder = holder
+    return holder.conns
+
+# 執行緒快取連線的 sqlite3 statement cache 大小（預設 128）；常駐連線才有意義。
+_CACHED_STATEMENTS = 256
+
+
+def _get_rw_connection(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    取得目前執行緒專用的讀寫連線（設定同 _get_connection，autocommit）。
+
+    連線會快取在執行緒上重複使用，sqlite3 的 statement cache 因此能跨呼叫命中，
+    熱路徑的寫入不必每次重新開檔與解析 SQL；呼叫端「不要」close。
+    寫入請用 _write_transaction() 包住：例外時會 ROLLBACK，連線不會殘留未結束的交易。
+    """
+    path = _get_db_path(db_path)
+    conns = _thread_connections()
+    conn = conns.get(("rw", path))
+    if conn is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(
+            path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            timeout=5.0,
+            isolation_level=None,
+            cached_statements=_CACHED_STATEMENTS,
+        )
+        _apply_pragmas(conn, path)
+        conn.row_factory = sqlite3.Row
+        conns[("rw", path)] = conn
+    return conn
+
+
+def _get_ro_connection(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    取得目前執行緒專用的唯讀連線（mode=ro + PRAGMA query_only）。
+
+    連線會快取在執行緒上重複使用，省去列表類 API 每次重新開檔與 WAL 初始化的成本；
+    呼叫端「不要」close。WAL 模式下這些讀取不會卡住寫入中的 worker。
+    """
+    path = _get_db_path(db_path)
+    conns = _thread_connections()
+    conn = conns.get(("ro", path))
+    if conn is None:
+        uri = f"{Path(os.path.abspath(path)).as_uri()}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            timeout=5.0,
+            cached_statements=_CACHED_STATEMENTS,
+        )
+        _apply_pragmas(conn, path, read_only=True)
+        conn.execute("PRAGMA query_only=1")
+        conn.row_factory = sqlite3.Row
+        conns[("ro", path)] = conn
+    return conn
+
+
+# (epoch 秒, "YYYY-MM-DDTHH:MM:SS")：同一秒內的呼叫共用已格式化好的前綴
+_utc_second_prefix: Tuple[int, str] = (-1, "")
+
+
+def _utc_now_iso_ms() -> Tuple[str, int]:
+    """
+    目前 UTC 時間的 (ISO8601 文字, Unix epoch 毫秒)，供 SQLite 寫入使用。
+
+    文字固定為 `YYYY-MM-DDTHH:MM:SS.ffffff+00:00`（等同 isoformat(timespec="microseconds")），
+    因此字串排序即時間排序；不建立 datetime 物件，秒以上的部分每秒只 strftime 一次。
+    """
+    global _utc_second_prefix
+    ns = time.time_ns()
+    sec, rem = divmod(ns, 1_000_000_000)
+    cached_sec, prefix = _utc_second_prefix
+    if cached_sec != sec:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+        _utc_second_prefix = (sec, prefix)
+    return f"{prefix}.{rem // 1000:06d}+00:00", ns // 1_000_000
+
+
+@contextmanager
+def begin_batch(db_path: Optional[str] = None) -> Iterator[Optional[sqlite3.Connection]]:
+    """
+    把多個寫入合併成一個 SQLite 交易（BEGIN IMMEDIATE ... COMMIT，只 fsync 一次）。
+
+    用法：
+        with begin_batch() as conn:
+            set_cached_analysis(..., conn=conn)
+            record_place_from_analysis(..., conn=conn)
+
+    區塊內任何例外都會 ROLLBACK 整批。使用 Postgres 時 yield None：
+    各函式照舊各自連線、各自提交。
+    """
+    if _use_postgres_cache():
+        yield None
+        return
+    conn = _get_rw_connection(db_path)
+    with _write_transaction(conn):
+        yield conn
+
+
 def _get_postgres_url() -> str:
     """
     Vercel Postgres / Neon usually provides POSTGRES_URL (pooled) and/or DATABASE_URL.
@@ -132,7 +351,7 @@ def init_db(db_path: Optional[str] = None) -> None:
     conn = _get_connection(db_path)
     try:
         cur = conn.cursor()
-        # 啟用 WAL 以改善多讀少寫情境下的併發能力
+        # 啟用 WAL 以改善多讀少寫情境下的併發能力（journal_mode 不能在交易內切換）
         cur.execute("PRAGMA journal_mode=WAL")
         cur.execute(
             """
@@ -147,7 +366,6 @@ def init_db(db_path: Optional[str] = None) -> None:
             )
             """
         )
-        conn.commit()
     finally:
         conn.close()
 
@@ -217,29 +435,26 @@ def get_cached_analysis(
             return None
         return entry
 
-    conn = _get_connection(db_path)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT cache_key, mode, canonical_url, display_name, result_json, created_at
-            FROM analysis_cache
-            WHERE cache_key = ? AND mode = ?
-            """,
-            (cache_key, mode),
-        )
-        row = cur.fetchone()
-        if not row:
+    conn = _get_ro_connection(db_path)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT cache_key, mode, canonical_url, display_name, result_json, created_at
+        FROM analysis_cache
+        WHERE cache_key = ? AND mode = ?
+        """,
+        (cache_key, mode),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+
+    entry = _row_to_entry(row)
+    if now - entry.created_at > timedelta(seconds=CACHE_TTL_SECONDS):
+        # 視同 miss（不在這裡刪除，交給 purge_expired 或後台處理）
+        if not allow_stale:
             return None
-
-        entry = _row_to_entry(row)
-        if now - entry.created_at > timedelta(seconds=CACHE_TTL_SECONDS):
-            # 視同 miss（不在這裡刪除，交給 purge_expired 或後台處理）
-            if not allow_stale:
-                return None
-        return entry
-    finally:
-        conn.close()
+    return entry
 
 
 def set_cached_analysis(
@@ -249,10 +464,13 @@ def set_cached_analysis(
     display_name: str,
     result_obj: Any,
     db_path: Optional[str] = None,
+    *,
+    conn: Optional[sqlite3.Connection] = None,
 ) -> None:
     """
     寫入或覆寫快取紀錄。
     result_obj 會被序列化成 JSON 字串存入 result_json。
+    conn：begin_batch() 取得的連線；傳入時併入該批次交易（僅 SQLite）。
     """
     created_at_dt = datetime.now(timezone.utc)
     try:
@@ -285,10 +503,8 @@ def set_cached_analysis(
         return
 
     created_at = created_at_dt.isoformat()
-    conn = _get_connection(db_path)
-    try:
-        cur = conn.cursor()
-        cur.execute(
+    with _write_scope(conn, db_path) as conn:
+        conn.execute(
             """
             INSERT INTO analysis_cache (
                 cache_key, mode, canonical_url, display_name, result_json, created_at
@@ -302,9 +518,6 @@ def set_cached_analysis(
             """,
             (cache_key, mode, canonical_url, display_name, result_json, created_at),
         )
-        conn.commit()
-    finally:
-        conn.close()
 
 
 def delete_cache_entry(
@@ -326,16 +539,12 @@ def delete_cache_entry(
             conn.close()
         return
 
-    conn = _get_connection(db_path)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            "DELETE FROM analysis_cache WHERE cache_key = ? AND mode = ?",
-            (cache_key, mode),
-        )
-        conn.commit()
-    finally:
-        conn.close()
+    # 單一語句：autocommit 連線本身即一個交易，不需另外 BEGIN / COMMIT
+    conn = _get_rw_connection(db_path)
+    conn.execute(
+        "DELETE FROM analysis_cache WHERE cache_key = ? AND mode = ?",
+        (cache_key, mode),
+    )
 
 
 def purge_expired(
@@ -360,18 +569,12 @@ def purge_expired(
             conn.close()
 
     threshold_str = threshold.isoformat()
-    conn = _get_connection(db_path)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            "DELETE FROM analysis_cache WHERE created_at < ?",
-            (threshold_str,),
-        )
-        deleted = cur.rowcount or 0
-        conn.commit()
-        return deleted
-    finally:
-        conn.close()
+    conn = _get_rw_connection(db_path)
+    cur = conn.execute(
+        "DELETE FROM analysis_cache WHERE created_at < ?",
+        (threshold_str,),
+    )
+    return cur.rowcount or 0
 
 
 __all__ = [
@@ -379,6 +582,7 @@ __all__ = [
     "CACHE_TTL_SECONDS",
     "DEFAULT_DB_PATH",
     "init_db",
+    "begin_batch",
     "get_cached_analysis",
     "set_cached_analysis",
     "delete_cache_entry",
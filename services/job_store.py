@@ -28,7 +28,6 @@ def init_job_db(db_path: Optional[str] = None) -> None:
             """
         )
         cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs(updated_at)")
-        conn.commit()
     finally:
         conn.close()
 
@@ -61,7 +60,6 @@ def create_job(
             """,
             (job_id, kind, tag, status, int(total) if total is not None else None, message, now, now),
         )
-        conn.commit()
     finally:
         conn.close()
     return job_id
@@ -108,7 +106,6 @@ def update_job(
     try:
         cur = conn.cursor()
         cur.execute(f"UPDATE jobs SET {', '.join(sets)} WHERE job_id = ?", tuple(vals))
-        conn.commit()
     finally:
         conn.close()
 
@@ -1,11 +1,547 @@
+import functools
 import os
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from .cache_store import _get_connection
+from .cache_store import (
+    _get_connection,
+    _get_ro_connection,
+    _utc_now_iso_ms,
+    _write_scope,
+    _write_transaction,
+)
 
 
+# Hot write statements are kept as module-level constants so every call hands the
+# driver the very same string object (sqlite3's per-connection statement cache is
+# keyed on the SQL text).
+#
+# The places upserts carry a WHERE on their DO UPDATE: re-recording an analysis whose
+# stored values are unchanged (common when results come back from cache) is a no-op
+# instead of a page write + WAL append. Note that last_analyzed_at therefore only moves
+# when something about the place actually changed.
+_SQL_UPSERT_PLACE_PG = """
+INSERT INTO places (
+    canonical_url,
+    display_name,
+    address,
+    google_rating,
+    user_ratings_total,
+    last_overall_score,
+    total_reviews_analyzed,
+    last_analyzed_at
+)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+ON CONFLICT (canonical_url) DO UPDATE SET
+    display_name = EXCLUDED.display_name,
+    address = COALESCE(EXCLUDED.address, places.address),
+    google_rating = EXCLUDED.google_rating,
+    user_ratings_total = EXCLUDED.user_ratings_total,
+    last_overall_score = EXCLUDED.last_overall_score,
+    total_reviews_analyzed = EXCLUDED.total_reviews_analyzed,
+    last_analyzed_at = EXCLUDED.last_analyzed_at
+WHERE places.display_name IS DISTINCT FROM EXCLUDED.display_name
+    OR places.google_rating IS DISTINCT FROM EXCLUDED.google_rating
+    OR places.user_ratings_total IS DISTINCT FROM EXCLUDED.user_ratings_total
+    OR places.last_overall_score IS DISTINCT FROM EXCLUDED.last_overall_score
+    OR places.total_reviews_analyzed IS DISTINCT FROM EXCLUDED.total_reviews_analyzed
+    OR (EXCLUDED.address IS NOT NULL AND places.address IS DISTINCT FROM EXCLUDED.address)
+RETURNING id, last_analyzed_at
+"""
+
+# Fallback when the upsert above was a no-op (RETURNING yields no row in that case).
+_SQL_SELECT_PLACE_KEY_PG = "SELECT id, last_analyzed_at FROM places WHERE canonical_url = %s"
+
+_SQL_UPSERT_PLACE_SQLITE = """
+INSERT INTO places (
+    canonical_url,
+    display_name,
+    address,
+    google_rating,
+    user_ratings_total,
+    last_overall_score,
+    total_reviews_analyzed,
+    last_analyzed_at,
+    last_analyzed_at_ms
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(canonical_url) DO UPDATE SET
+    display_name = excluded.display_name,
+    google_rating = excluded.google_rating,
+    user_ratings_total = excluded.user_ratings_total,
+    last_overall_score = excluded.last_overall_score,
+    total_reviews_analyzed = excluded.total_reviews_analyzed,
+    last_analyzed_at = excluded.last_analyzed_at,
+    last_analyzed_at_ms = excluded.last_analyzed_at_ms
+WHERE places.display_name IS NOT excluded.display_name
+    OR places.google_rating IS NOT excluded.google_rating
+    OR places.user_ratings_total IS NOT excluded.user_ratings_total
+    OR places.last_overall_score IS NOT excluded.last_overall_score
+    OR places.total_reviews_analyzed IS NOT excluded.total_reviews_analyzed
+RETURNING id, last_analyzed_at
+"""
+
+_SQL_SELECT_PLACE_KEY_SQLITE = "SELECT id, last_analyzed_at FROM places WHERE canonical_url = ?"
+
+_SQL_UPSERT_CATALOG_PG = """
+INSERT INTO place_catalog (
+    tag,
+    canonical_url,
+    maps_url,
+    place_id,
+    name,
+    address,
+    lat,
+    lng,
+    google_rating,
+    user_ratings_total,
+    source_query,
+    discovered_at,
+    last_seen_at,
+    last_analyzed_at,
+    last_analyze_status,
+    last_error
+)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+ON CONFLICT (tag, canonical_url) DO UPDATE SET
+    maps_url = COALESCE(EXCLUDED.maps_url, place_catalog.maps_url),
+    place_id = COALESCE(EXCLUDED.place_id, place_catalog.place_id),
+    name = COALESCE(EXCLUDED.name, place_catalog.name),
+    address = COALESCE(EXCLUDED.address, place_catalog.address),
+    lat = COALESCE(EXCLUDED.lat, place_catalog.lat),
+    lng = COALESCE(EXCLUDED.lng, place_catalog.lng),
+    google_rating = COALESCE(EXCLUDED.google_rating, place_catalog.google_rating),
+    user_ratings_total = COALESCE(EXCLUDED.user_ratings_total, place_catalog.user_ratings_total),
+    source_query = COALESCE(EXCLUDED.source_query, place_catalog.source_query),
+    last_seen_at = EXCLUDED.last_seen_at,
+    last_analyzed_at = COALESCE(EXCLUDED.last_analyzed_at, place_catalog.last_analyzed_at),
+    last_analyze_status = COALESCE(EXCLUDED.last_analyze_status, place_catalog.last_analyze_status),
+    last_error = COALESCE(EXCLUDED.last_error, place_catalog.last_error)
+"""
+
+_SQL_UPSERT_CATALOG_SQLITE = """
+INSERT INTO place_catalog (
+    tag,
+    canonical_url,
+    maps_url,
+    place_id,
+    name,
+    address,
+    lat,
+    lng,
+    google_rating,
+    user_ratings_total,
+    source_query,
+    discovered_at,
+    last_seen_at,
+    last_analyzed_at,
+    last_analyze_status,
+    last_error,
+    last_seen_at_ms
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(tag, canonical_url) DO UPDATE SET
+    maps_url = COALESCE(excluded.maps_url, place_catalog.maps_url),
+    place_id = COALESCE(excluded.place_id, place_catalog.place_id),
+    name = COALESCE(excluded.name, place_catalog.name),
+    address = COALESCE(excluded.address, place_catalog.address),
+    lat = COALESCE(excluded.lat, place_catalog.lat),
+    lng = COALESCE(excluded.lng, place_catalog.lng),
+    google_rating = COALESCE(excluded.google_rating, place_catalog.google_rating),
+    user_ratings_total = COALESCE(excluded.user_ratings_total, place_catalog.user_ratings_total),
+    source_query = COALESCE(excluded.source_query, place_catalog.source_query),
+    last_seen_at = excluded.last_seen_at,
+    last_seen_at_ms = excluded.last_seen_at_ms,
+    last_analyzed_at = COALESCE(excluded.last_analyzed_at, place_catalog.last_analyzed_at),
+    last_analyze_status = COALESCE(excluded.last_analyze_status, place_catalog.last_analyze_status),
+    last_error = COALESCE(excluded.last_error, place_catalog.last_error)
+"""
+
+# upsert_catalog_places_bulk (Postgres): COPY rows into a per-transaction staging table,
+# then merge them with one INSERT ... SELECT using the same conflict rules as above.
+_CATALOG_BULK_COLUMNS = (
+    "tag",
+    "canonical_url",
+    "maps_url",
+    "place_id",
+    "name",
+    "address",
+    "lat",
+    "lng",
+    "google_rating",
+    "user_ratings_total",
+    "source_query",
+    "discovered_at",
+    "last_seen_at",
+    "last_analyzed_at",
+    "last_analyze_status",
+    "last_error",
+)
+
+_SQL_CREATE_TMP_CATALOG_PG = """
+CREATE TEMP TABLE tmp_catalog (
+    tag TEXT,
+    canonical_url TEXT,
+    maps_url TEXT,
+    place_id TEXT,
+    name TEXT,
+    address TEXT,
+    lat DOUBLE PRECISION,
+    lng DOUBLE PRECISION,
+    google_rating DOUBLE PRECISION,
+    user_ratings_total BIGINT,
+    source_query TEXT,
+    discovered_at TIMESTAMPTZ,
+    last_seen_at TIMESTAMPTZ,
+    last_analyzed_at TIMESTAMPTZ,
+    last_analyze_status TEXT,
+    last_error TEXT
+) ON COMMIT DROP
+"""
+
+_SQL_COPY_TMP_CATALOG_PG = f"COPY tmp_catalog ({', '.join(_CATALOG_BULK_COLUMNS)}) FROM STDIN"
+
+_SQL_MERGE_TMP_CATALOG_PG = f"""
+INSERT INTO place_catalog ({', '.join(_CATALOG_BULK_COLUMNS)})
+SELECT {', '.join(_CATALOG_BULK_COLUMNS)} FROM tmp_catalog
+ON CONFLICT (tag, canonical_url) DO UPDATE SET
+    maps_url = COALESCE(EXCLUDED.maps_url, place_catalog.maps_url),
+    place_id = COALESCE(EXCLUDED.place_id, place_catalog.place_id),
+    name = COALESCE(EXCLUDED.name, place_catalog.name),
+    address = COALESCE(EXCLUDED.address, place_catalog.address),
+    lat = COALESCE(EXCLUDED.lat, place_catalog.lat),
+    lng = COALESCE(EXCLUDED.lng, place_catalog.lng),
+    google_rating = COALESCE(EXCLUDED.google_rating, place_catalog.google_rating),
+    user_ratings_total = COALESCE(EXCLUDED.user_ratings_total, place_catalog.user_ratings_total),
+    source_query = COALESCE(EXCLUDED.source_query, place_catalog.source_query),
+    last_seen_at = EXCLUDED.last_seen_at,
+    last_analyzed_at = COALESCE(EXCLUDED.last_analyzed_at, place_catalog.last_analyzed_at),
+    last_analyze_status = COALESCE(EXCLUDED.last_analyze_status, place_catalog.last_analyze_status),
+    last_error = COALESCE(EXCLUDED.last_error, place_catalog.last_error)
+"""
+
+_SQL_UPDATE_CATALOG_STATUS_PG = """
+UPDATE place_catalog
+SET last_analyzed_at = %s,
+    last_analyze_status = %s,
+    last_error = %s
+WHERE tag = %s AND canonical_url = %s
+"""
+
+_SQL_UPDATE_CATALOG_STATUS_SQLITE = """
+UPDATE place_catalog
+SET last_analyzed_at = ?,
+    last_analyze_status = ?,
+    last_error = ?
+WHERE tag = ? AND canonical_url = ?
+"""
+
+# list_catalog_with_analysis: the SQL variants per backend are built once at import,
+# instead of re-assembling the f-string on every call. SQLite orders by the integer
+# last_seen_at_ms column.
+#
+# only_analyzed=True joins `places` (the join is the filter). Otherwise the catalog page
+# is read on its own and the analysis columns are merged from one keyed lookup on
+# `places` for just the urls on that page (see _merge_place_analysis).
+_SQL_LIST_CATALOG_WITH_ANALYSIS_TEMPLATE = """
+SELECT
+    c.id,
+    c.tag,
+    c.canonical_url,
+    c.maps_url,
+    c.place_id,
+    c.name,
+    c.address,
+    c.lat,
+    c.lng,
+    c.google_rating,
+    c.user_ratings_total,
+    c.source_query,
+    c.discovered_at,
+    c.last_seen_at,
+    c.last_analyzed_at AS catalog_last_analyzed_at,
+    c.last_analyze_status,
+    c.last_error,
+    p.display_name AS analyzed_display_name,
+    p.last_overall_score,
+    p.total_reviews_analyzed,
+    p.last_analyzed_at AS analyzed_last_analyzed_at
+FROM place_catalog c
+JOIN places p
+    ON p.canonical_url = c.canonical_url
+WHERE c.tag = {param}
+ORDER BY {order_by} DESC
+LIMIT {param}
+"""
+
+_SQL_LIST_CATALOG_FOR_ANALYSIS_TEMPLATE = """
+SELECT
+    c.id,
+    c.tag,
+    c.canonical_url,
+    c.maps_url,
+    c.place_id,
+    c.name,
+    c.address,
+    c.lat,
+    c.lng,
+    c.google_rating,
+    c.user_ratings_total,
+    c.source_query,
+    c.discovered_at,
+    c.last_seen_at,
+    c.last_analyzed_at AS catalog_last_analyzed_at,
+    c.last_analyze_status,
+    c.last_error
+FROM place_catalog c
+WHERE c.tag = {param}
+ORDER BY {order_by} DESC
+LIMIT {param}
+"""
+
+_SQL_LIST_CATALOG_WITH_ANALYSIS_PG_ALL = _SQL_LIST_CATALOG_FOR_ANALYSIS_TEMPLATE.format(
+    param="%s", order_by="c.last_seen_at"
+)
+_SQL_LIST_CATALOG_WITH_ANALYSIS_PG_ONLY_ANALYZED = _SQL_LIST_CATALOG_WITH_ANALYSIS_TEMPLATE.format(
+    param="%s", order_by="c.last_seen_at"
+)
+_SQL_LIST_CATALOG_WITH_ANALYSIS_SQLITE_ALL = _SQL_LIST_CATALOG_FOR_ANALYSIS_TEMPLATE.format(
+    param="?", order_by="c.last_seen_at_ms"
+)
+_SQL_LIST_CATALOG_WITH_ANALYSIS_SQLITE_ONLY_ANALYZED = _SQL_LIST_CATALOG_WITH_ANALYSIS_TEMPLATE.format(
+    param="?", order_by="c.last_seen_at_ms"
+)
+
+# Output keys filled from `places`, in the column order of the lookups below.
+_PLACE_ANALYSIS_KEYS = (
+    "analyzed_display_name",
+    "last_overall_score",
+    "total_reviews_analyzed",
+    "analyzed_last_analyzed_at",
+)
+
+_SQL_PLACE_ANALYSIS_BY_URLS_PG = """
+SELECT canonical_url, display_name, last_overall_score, total_reviews_analyzed, last_analyzed_at
+FROM places
+WHERE canonical_url = ANY(%s)
+"""
+
+_SQL_PLACE_ANALYSIS_BY_URLS_SQLITE = """
+SELECT canonical_url, display_name, last_overall_score, total_reviews_analyzed, last_analyzed_at
+FROM places
+WHERE canonical_url IN ({placeholders})
+"""
+# Stay under the 999 bound parameter limit of older SQLite builds.
+_SQLITE_IN_CHUNK = 500
+
+# Schema DDL (init_place_db) and the list queries.
+
+_SQL_CREATE_PLACES_PG = """
+CREATE TABLE IF NOT EXISTS places (
+    id BIGSERIAL PRIMARY KEY,
+    canonical_url TEXT NOT NULL UNIQUE,
+    display_name TEXT NOT NULL,
+    address TEXT,
+    google_rating DOUBLE PRECISION,
+    user_ratings_total BIGINT,
+    last_overall_score DOUBLE PRECISION,
+    total_reviews_analyzed BIGINT,
+    last_analyzed_at TIMESTAMPTZ NOT NULL
+)
+"""
+
+_SQL_CREATE_CATALOG_PG = """
+CREATE TABLE IF NOT EXISTS place_catalog (
+    id BIGSERIAL PRIMARY KEY,
+    tag TEXT NOT NULL,
+    canonical_url TEXT NOT NULL,
+    maps_url TEXT,
+    place_id TEXT,
+    name TEXT,
+    address TEXT,
+    lat DOUBLE PRECISION,
+    lng DOUBLE PRECISION,
+    google_rating DOUBLE PRECISION,
+    user_ratings_total BIGINT,
+    source_query TEXT,
+    discovered_at TIMESTAMPTZ NOT NULL,
+    last_seen_at TIMESTAMPTZ NOT NULL,
+    last_analyzed_at TIMESTAMPTZ,
+    last_analyze_status TEXT,
+    last_error TEXT,
+    UNIQUE (tag, canonical_url)
+)
+"""
+
+_SQL_CREATE_PLACES_SQLITE = """
+CREATE TABLE IF NOT EXISTS places (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    canonical_url TEXT NOT NULL UNIQUE,
+    display_name TEXT NOT NULL,
+    address TEXT,
+    google_rating REAL,
+    user_ratings_total INTEGER,
+    last_overall_score REAL,
+    total_reviews_analyzed INTEGER,
+    last_analyzed_at TEXT NOT NULL,
+    last_analyzed_at_ms INTEGER
+)
+"""
+
+_SQL_CREATE_CATALOG_SQLITE = """
+CREATE TABLE IF NOT EXISTS place_catalog (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tag TEXT NOT NULL,
+    canonical_url TEXT NOT NULL,
+    maps_url TEXT,
+    place_id TEXT,
+    name TEXT,
+    address TEXT,
+    lat REAL,
+    lng REAL,
+    google_rating REAL,
+    user_ratings_total INTEGER,
+    source_query TEXT,
+    discovered_at TEXT NOT NULL,
+    last_seen_at TEXT NOT NULL,
+    last_analyzed_at TEXT,
+    last_analyze_status TEXT,
+    last_error TEXT,
+    last_seen_at_ms INTEGER,
+    UNIQUE (tag, canonical_url)
+)
+"""
+
+# SQLite expression converting an ISO8601 TEXT timestamp to Unix epoch milliseconds.
+_SQL_ISO_TO_EPOCH_MS = "CAST(ROUND((julianday({col}) - 2440587.5) * 86400000.0) AS INTEGER)"
+
+# Backfill for rows whose integer is missing or has drifted from its TEXT column; runs once,
+# when the sync triggers below are first installed.
+_SQL_RESYNC_PLACES_MS_SQLITE = f"""
+UPDATE places
+SET last_analyzed_at_ms = {_SQL_ISO_TO_EPOCH_MS.format(col="last_analyzed_at")}
+WHERE last_analyzed_at_ms IS NOT {_SQL_ISO_TO_EPOCH_MS.format(col="last_analyzed_at")}
+"""
+
+_SQL_RESYNC_CATALOG_MS_SQLITE = f"""
+UPDATE place_catalog
+SET last_seen_at_ms = {_SQL_ISO_TO_EPOCH_MS.format(col="last_seen_at")}
+WHERE last_seen_at_ms IS NOT {_SQL_ISO_TO_EPOCH_MS.format(col="last_seen_at")}
+"""
+
+# Writers outside this module (do_migration.py, ad-hoc scripts) only set the TEXT column.
+# These triggers fill in the integer whenever a write leaves it NULL (INSERT) or unchanged
+# while the TEXT moved (UPDATE); place_store's own writers set both and skip the trigger body.
+_SQL_MS_INSERT_TRIGGER_TEMPLATE = """
+CREATE TRIGGER IF NOT EXISTS {name}_ins AFTER INSERT ON {table}
+WHEN NEW.{col}_ms IS NULL AND NEW.{col} IS NOT NULL
+BEGIN
+    UPDATE {table} SET {col}_ms = {new_ms} WHERE id = NEW.id;
+END
+"""
+
+_SQL_MS_UPDATE_TRIGGER_TEMPLATE = """
+CREATE TRIGGER IF NOT EXISTS {name}_upd AFTER UPDATE OF {col} ON {table}
+WHEN NEW.{col} IS NOT OLD.{col} AND NEW.{col}_ms IS OLD.{col}_ms
+BEGIN
+    UPDATE {table} SET {col}_ms = {new_ms} WHERE id = NEW.id;
+END
+"""
+
+_SQLITE_MS_TRIGGERS = (
+    ("trg_places_ms", "places", "last_analyzed_at"),
+    ("trg_pc_ms", "place_catalog", "last_seen_at"),
+)
+
+_SQL_LIST_PLACES_PG = """
+SELECT
+    id,
+    canonical_url,
+    display_name,
+    address,
+    google_rating,
+    user_ratings_total,
+    last_overall_score,
+    total_reviews_analyzed,
+    last_analyzed_at
+FROM places
+ORDER BY last_analyzed_at DESC
+LIMIT %s
+"""
+
+_SQL_LIST_PLACES_SQLITE = """
+SELECT
+    id,
+    canonical_url,
+    display_name,
+    address,
+    google_rating,
+    user_ratings_total,
+    last_overall_score,
+    total_reviews_analyzed,
+    last_analyzed_at
+FROM places
+ORDER BY last_analyzed_at_ms DESC
+LIMIT ?
+"""
+
+_SQL_LIST_CATALOG_PG = """
+SELECT
+    id,
+    tag,
+    canonical_url,
+    maps_url,
+    place_id,
+    name,
+    address,
+    lat,
+    lng,
+    google_rating,
+    user_ratings_total,
+    source_query,
+    discovered_at,
+    last_seen_at,
+    last_analyzed_at,
+    last_analyze_status,
+    last_error
+FROM place_catalog
+WHERE tag = %s
+ORDER BY last_seen_at DESC
+LIMIT %s
+"""
+
+_SQL_LIST_CATALOG_SQLITE = """
+SELECT
+    id,
+    tag,
+    canonical_url,
+    maps_url,
+    place_id,
+    name,
+    address,
+    lat,
+    lng,
+    google_rating,
+    user_ratings_total,
+    source_query,
+    discovered_at,
+    last_seen_at,
+    last_analyzed_at,
+    last_analyze_status,
+    last_error
+FROM place_catalog
+WHERE tag = ?
+ORDER BY last_seen_at_ms DESC
+LIMIT ?
+"""
+
+
+# The backend choice is read from the environment once per process (env vars do not
+# change under a running server); every public function branches on it, so this keeps
+# os.getenv out of hot write loops. Call _reset_pg_cache() after changing the env.
+@functools.lru_cache(maxsize=1)
 def _get_postgres_url() -> str:
     return (
         os.getenv("POSTGRES_URL")
@@ -15,11 +551,18 @@ def _get_postgres_url() -> str:
     ).strip()
 
 
+@functools.lru_cache(maxsize=1)
 def _use_postgres_places() -> bool:
     return bool(_get_postgres_url())
 
 
-def _pg_connect():
+def _reset_pg_cache() -> None:
+    """Forget the cached backend choice (for tests / scripts that modify env at runtime)."""
+    _get_postgres_url.cache_clear()
+    _use_postgres_places.cache_clear()
+
+
+def _pg_connect(*, autocommit: bool = False):
     # Lazy import so local dev without psycopg still works if Postgres is not enabled.
     import psycopg
     from psycopg.rows import dict_row
@@ -27,7 +570,84 @@ def _pg_connect():
     url = _get_postgres_url()
     if not url:
         raise RuntimeError("POSTGRES_URL is not set")
-    return psycopg.connect(url, row_factory=dict_row)
+    # Read paths pass autocommit=True: no implicit BEGIN/ROLLBACK round trips around a SELECT.
+    return psycopg.connect(url, row_factory=dict_row, autocommit=autocommit)
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """Best-effort float() for LLM/analysis fields: None for missing or non-numeric values."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    """Best-effort int() for analysis fields: None for missing or non-integer values."""
+    if value is None:
+        return None
+    if type(value) is int:
+        return value
+    if isinstance(value, str):
+        s = value.strip()
+        digits = s[1:] if s[:1] in ("+", "-") else s
+        # Plain decimal integers skip the exception path; anything else gets int()'s own
+        # verdict, so "1_000" still parses and "4.5" / "1e3" / "n/a" give None.
+        if digits.isdecimal():
+            return int(s)
+        try:
+            return int(s)
+        except ValueError:
+            return None
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _add_column_if_missing(cur: sqlite3.Cursor, table: str, column: str, decl: str) -> bool:
+    """Add the column when the table lacks it; returns True if it was added."""
+    cols = {row[1] for row in cur.execute(f"PRAGMA table_info({table})").fetchall()}
+    if column in cols:
+        return False
+    cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    return True
+
+
+def _fetch_dicts(cur: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    """
+    Fetch all rows as plain dicts, zipping against the column names read once from
+    `cursor.description` (the cursor must have row_factory=None so rows are tuples).
+    """
+    cols = tuple(d[0] for d in cur.description)
+    return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+
+def _merge_place_analysis(items: List[Dict[str, Any]], by_url: Dict[str, Tuple[Any, ...]]) -> None:
+    """Fill the _PLACE_ANALYSIS_KEYS of each catalog item from `places` (None when not analysed)."""
+    missing = (None,) * len(_PLACE_ANALYSIS_KEYS)
+    for d in items:
+        d.update(zip(_PLACE_ANALYSIS_KEYS, by_url.get(d["canonical_url"], missing)))
+
+
+# Indexes init_place_db creates, and the baseline ones it replaces. Any mismatch with what the
+# DB already has means the schema changed on this startup and the tables get re-ANALYZEd.
+_PG_NEW_INDEXES = frozenset({"idx_places_last_analyzed", "idx_pc_tag_seen"})
+_SQLITE_NEW_INDEXES = frozenset({"idx_places_last_analyzed_ms", "idx_pc_tag_seen_ms"})
+_OLD_INDEXES = (
+    "idx_place_catalog_tag",
+    "idx_place_catalog_last_seen",
+    "idx_place_catalog_last_analyzed",
+)
 
 
 def init_place_db(db_path: Optional[str] = None) -> None:
@@ -44,57 +664,34 @@ def init_place_db(db_path: Optional[str] = None) -> None:
       - last_overall_score REAL
       - total_reviews_analyzed INTEGER
       - last_analyzed_at TEXT (ISO8601 UTC)
+      - last_analyzed_at_ms INTEGER (Unix epoch ms of last_analyzed_at; SQLite sort key)
     """
     if _use_postgres_places():
         conn = _pg_connect()
         try:
             with conn.cursor() as cur:
+                cur.execute(_SQL_CREATE_PLACES_PG)
+                cur.execute(_SQL_CREATE_CATALOG_PG)
                 cur.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS places (
-                        id BIGSERIAL PRIMARY KEY,
-                        canonical_url TEXT NOT NULL UNIQUE,
-                        display_name TEXT NOT NULL,
-                        address TEXT,
-                        google_rating DOUBLE PRECISION,
-                        user_ratings_total BIGINT,
-                        last_overall_score DOUBLE PRECISION,
-                        total_reviews_analyzed BIGINT,
-                        last_analyzed_at TIMESTAMPTZ NOT NULL
-                    )
-                    """
+                    "SELECT indexname FROM pg_indexes WHERE tablename IN ('places', 'place_catalog')"
                 )
-                cur.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS place_catalog (
-                        id BIGSERIAL PRIMARY KEY,
-                        tag TEXT NOT NULL,
-                        canonical_url TEXT NOT NULL,
-                        maps_url TEXT,
-                        place_id TEXT,
-                        name TEXT,
-                        address TEXT,
-                        lat DOUBLE PRECISION,
-                        lng DOUBLE PRECISION,
-                        google_rating DOUBLE PRECISION,
-                        user_ratings_total BIGINT,
-                        source_query TEXT,
-                        discovered_at TIMESTAMPTZ NOT NULL,
-                        last_seen_at TIMESTAMPTZ NOT NULL,
-                        last_analyzed_at TIMESTAMPTZ,
-                        last_analyze_status TEXT,
-                        last_error TEXT,
-                        UNIQUE (tag, canonical_url)
-                    )
-                    """
+                indexes = {row["indexname"] for row in cur.fetchall()}
+                schema_changed = not indexes.issuperset(_PG_NEW_INDEXES) or not indexes.isdisjoint(
+                    _OLD_INDEXES
                 )
-                cur.execute("CREATE INDEX IF NOT EXISTS idx_place_catalog_tag ON place_catalog(tag)")
                 cur.execute(
-                    "CREATE INDEX IF NOT EXISTS idx_place_catalog_last_seen ON place_catalog(last_seen_at)"
+                    "CREATE INDEX IF NOT EXISTS idx_places_last_analyzed ON places(last_analyzed_at DESC)"
                 )
                 cur.execute(
-                    "CREATE INDEX IF NOT EXISTS idx_place_catalog_last_analyzed ON place_catalog(last_analyzed_at)"
+                    "CREATE INDEX IF NOT EXISTS idx_pc_tag_seen ON place_catalog(tag, last_seen_at DESC)"
                 )
+                for name in _OLD_INDEXES:
+                    cur.execute(f"DROP INDEX IF EXISTS {name}")
+                # Fresh statistics keep the catalog -> places LEFT JOIN on the canonical_url
+                # unique index instead of a hash join over all of `places`. Only needed after a
+                # schema change; autovacuum keeps them current from then on.
+                if schema_changed:
+                    cur.execute("ANALYZE places, place_catalog")
             conn.commit()
         finally:
             conn.close()
@@ -103,63 +700,69 @@ def init_place_db(db_path: Optional[str] = None) -> None:
     conn = _get_connection(db_path)
     try:
         cur = conn.cursor()
-        # Core analysed places table
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS places (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                canonical_url TEXT NOT NULL UNIQUE,
-                display_name TEXT NOT NULL,
-                address TEXT,
-                google_rating REAL,
-                user_ratings_total INTEGER,
-                last_overall_score REAL,
-                total_reviews_analyzed INTEGER,
-                last_analyzed_at TEXT NOT NULL
-            )
-            """
-        )
+        # Schema + migration + backfill commit together (the connection is autocommit).
+        with _write_transaction(conn):
+            # Core analysed places table
+            cur.execute(_SQL_CREATE_PLACES_SQLITE)
 
-        # Catalog table: discovered places (e.g. prebuilt district lists) before analysis.
-        # IMPORTANT:
-        #   - We allow the same canonical_url to appear under multiple tags (e.g. a chain
-        #     restaurant that logically belongs to several districts / themes).
-        #   - Therefore the natural uniqueness key is (tag, canonical_url) instead of just
-        #     canonical_url.
-        #   - This keeps each catalog "view" independent while still using a shared
-        #     underlying analysis cache / places table keyed only by canonical_url.
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS place_catalog (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tag TEXT NOT NULL,
-                canonical_url TEXT NOT NULL,
-                maps_url TEXT,
-                place_id TEXT,
-                name TEXT,
-                address TEXT,
-                lat REAL,
-                lng REAL,
-                google_rating REAL,
-                user_ratings_total INTEGER,
-                source_query TEXT,
-                discovered_at TEXT NOT NULL,
-                last_seen_at TEXT NOT NULL,
-                last_analyzed_at TEXT,
-                last_analyze_status TEXT,
-                last_error TEXT,
-                UNIQUE (tag, canonical_url)
+            # Catalog table: discovered places (e.g. prebuilt district lists) before analysis.
+            # IMPORTANT:
+            #   - We allow the same canonical_url to appear under multiple tags (e.g. a chain
+            #     restaurant that logically belongs to several districts / themes).
+            #   - Therefore the natural uniqueness key is (tag, canonical_url) instead of just
+            #     canonical_url.
+            #   - This keeps each catalog "view" independent while still using a shared
+            #     underlying analysis cache / places table keyed only by canonical_url.
+            cur.execute(_SQL_CREATE_CATALOG_SQLITE)
+            indexes = {
+                row[0] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            }
+            schema_changed = not indexes.issuperset(_SQLITE_NEW_INDEXES) or not indexes.isdisjoint(
+                _OLD_INDEXES
             )
-            """
-        )
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_place_catalog_tag ON place_catalog(tag)")
-        cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_place_catalog_last_seen ON place_catalog(last_seen_at)"
-        )
-        cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_place_catalog_last_analyzed ON place_catalog(last_analyzed_at)"
-        )
-        conn.commit()
+            triggers = {
+                row[0] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            }
+            # Integer sort keys next to the TEXT timestamps. SQLite writers take both values from
+            # _utc_now_iso_ms(): the list queries ORDER BY the integers (8-byte keys) and return
+            # the TEXT column, so API output is unchanged. Older DBs get the
+            # columns added here; writers that only set the TEXT column (do_migration.py,
+            # external scripts) are covered by the sync triggers.
+            if _add_column_if_missing(cur, "places", "last_analyzed_at_ms", "INTEGER"):
+                schema_changed = True
+            if _add_column_if_missing(cur, "place_catalog", "last_seen_at_ms", "INTEGER"):
+                schema_changed = True
+            if not all(
+                f"{name}_{kind}" in triggers for name, _, _ in _SQLITE_MS_TRIGGERS for kind in ("ins", "upd")
+            ):
+                # First startup with the sync triggers: backfill / repair every row once, then
+                # the triggers keep the integers in step with the TEXT columns.
+                schema_changed = True
+                cur.execute(_SQL_RESYNC_PLACES_MS_SQLITE)
+                cur.execute(_SQL_RESYNC_CATALOG_MS_SQLITE)
+                for name, table, col in _SQLITE_MS_TRIGGERS:
+                    new_ms = _SQL_ISO_TO_EPOCH_MS.format(col=f"NEW.{col}")
+                    for template in (_SQL_MS_INSERT_TRIGGER_TEMPLATE, _SQL_MS_UPDATE_TRIGGER_TEMPLATE):
+                        cur.execute(template.format(name=name, table=table, col=col, new_ms=new_ms))
+            # list_places walks this index newest-first instead of sorting the whole table.
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_places_last_analyzed_ms ON places(last_analyzed_at_ms DESC)"
+            )
+            # list_catalog_* filter on tag and order by last_seen_at_ms: one composite index
+            # serves both, so the older single-column indexes (and the unused last_analyzed one)
+            # go away.
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_pc_tag_seen_ms ON place_catalog(tag, last_seen_at_ms DESC)"
+            )
+            for name in _OLD_INDEXES:
+                cur.execute(f"DROP INDEX IF EXISTS {name}")
+            # Give the planner statistics for the catalog -> places join (canonical_url is
+            # already backed by the UNIQUE autoindex). Only after a schema change, so normal
+            # startups skip it; analysis_limit keeps it a sampled, bounded-cost pass.
+            if schema_changed:
+                cur.execute("PRAGMA analysis_limit=1000")
+                cur.execute("ANALYZE places")
+                cur.execute("ANALYZE place_catalog")
     finally:
         conn.close()
 
@@ -173,73 +776,45 @@ def record_place_from_analysis(
     google_rating: Optional[float] = None,
     user_ratings_total: Optional[int] = None,
     db_path: Optional[str] = None,
-) -> None:
+    conn: Optional[sqlite3.Connection] = None,
+) -> Optional[Dict[str, Any]]:
     """
     Upsert a place row whenever an analysis successfully completes.
 
     This builds a lightweight "map database" of analysed restaurants so that
     we know *what* has been analysed and can later present them like a map/list
     without calling Google Maps again.
+
+    If the stored row already holds identical values the write is skipped
+    (including its last_analyzed_at bump).
+
+    Returns `{"id", "last_analyzed_at"}` of the stored row (via RETURNING, so callers
+    don't need a follow-up SELECT), or None when canonical_url is empty.
+
+    SQLite: pass `conn` from `begin_batch()` to join that transaction.
     """
     if not canonical_url:
-        return
+        return None
 
     # Prefer explicit values passed from caller; otherwise, try to infer from analysis.
     if google_rating is None:
-        gr = analysis.get("google_rating")
-        try:
-            google_rating = float(gr) if gr is not None else None
-        except (TypeError, ValueError):
-            google_rating = None
+        google_rating = _to_float(analysis.get("google_rating"))
 
     if user_ratings_total is None:
-        ur = analysis.get("google_reviews_count") or analysis.get("total_reviews_analyzed")
-        try:
-            user_ratings_total = int(ur) if ur is not None else None
-        except (TypeError, ValueError):
-            user_ratings_total = None
-
-    overall_score_val = None
-    os_val = analysis.get("overall_score")
-    try:
-        overall_score_val = float(os_val) if os_val is not None else None
-    except (TypeError, ValueError):
-        overall_score_val = None
-
-    total_reviews = analysis.get("total_reviews_analyzed")
-    try:
-        total_reviews_int = int(total_reviews) if total_reviews is not None else None
-    except (TypeError, ValueError):
-        total_reviews_int = None
+        user_ratings_total = _to_int(
+            analysis.get("google_reviews_count") or analysis.get("total_reviews_analyzed")
+        )
 
-    now_dt = datetime.now(timezone.utc)
+    overall_score_val = _to_float(analysis.get("overall_score"))
+    total_reviews_int = _to_int(analysis.get("total_reviews_analyzed"))
 
     if _use_postgres_places():
+        now_dt = datetime.now(timezone.utc)
         conn = _pg_connect()
         try:
             with conn.cursor() as cur:
                 cur.execute(
-                    """
-                    INSERT INTO places (
-                        canonical_url,
-                        display_name,
-                        address,
-                        google_rating,
-                        user_ratings_total,
-                        last_overall_score,
-                        total_reviews_analyzed,
-                        last_analyzed_at
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (canonical_url) DO UPDATE SET
-                        display_name = EXCLUDED.display_name,
-                        address = COALESCE(EXCLUDED.address, places.address),
-                        google_rating = EXCLUDED.google_rating,
-                        user_ratings_total = EXCLUDED.user_ratings_total,
-                        last_overall_score = EXCLUDED.last_overall_score,
-                        total_reviews_analyzed = EXCLUDED.total_reviews_analyzed,
-                        last_analyzed_at = EXCLUDED.last_analyzed_at
-                    """,
+                    _SQL_UPSERT_PLACE_PG,
                     (
                         canonical_url,
                         display_name,
@@ -251,37 +826,27 @@ def record_place_from_analysis(
                         now_dt,
                     ),
                 )
+                row = cur.fetchone()
+                if row is None:
+                    cur.execute(_SQL_SELECT_PLACE_KEY_PG, (canonical_url,))
+                    row = cur.fetchone()
             conn.commit()
         finally:
             conn.close()
-        return
+        if row is None:
+            return None
+        d = dict(row)
+        la = d.get("last_analyzed_at")
+        if isinstance(la, datetime):
+            d["last_analyzed_at"] = la.astimezone(timezone.utc).isoformat()
+        return d
 
-    now = now_dt.isoformat()
+    now, now_ms = _utc_now_iso_ms()
 
-    conn = _get_connection(db_path)
-    try:
+    with _write_scope(conn, db_path) as conn:
         cur = conn.cursor()
         cur.execute(
-            """
-            INSERT INTO places (
-                canonical_url,
-                display_name,
-                address,
-                google_rating,
-                user_ratings_total,
-                last_overall_score,
-                total_reviews_analyzed,
-                last_analyzed_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(canonical_url) DO UPDATE SET
-                display_name = excluded.display_name,
-                google_rating = excluded.google_rating,
-                user_ratings_total = excluded.user_ratings_total,
-                last_overall_score = excluded.last_overall_score,
-                total_reviews_analyzed = excluded.total_reviews_analyzed,
-                last_analyzed_at = excluded.last_analyzed_at
-            """,
+            _SQL_UPSERT_PLACE_SQLITE,
             (
                 canonical_url,
                 display_name,
@@ -291,11 +856,14 @@ def record_place_from_analysis(
                 overall_score_val,
                 total_reviews_int,
                 now,
+                now_ms,
             ),
         )
-        conn.commit()
-    finally:
-        conn.close()
+        rows = cur.fetchall()
+        if not rows:
+            cur.execute(_SQL_SELECT_PLACE_KEY_SQLITE, (canonical_url,))
+            rows = cur.fetchall()
+    return dict(rows[0]) if rows else None
 
 
 def list_places(
@@ -306,25 +874,11 @@ def list_places(
     List recently analysed places from local DB, newest first.
     """
     if _use_postgres_places():
-        conn = _pg_connect()
+        conn = _pg_connect(autocommit=True)
         try:
             with conn.cursor() as cur:
                 cur.execute(
-                    """
-                    SELECT
-                        id,
-                        canonical_url,
-                        display_name,
-                        address,
-                        google_rating,
-                        user_ratings_total,
-                        last_overall_score,
-                        total_reviews_analyzed,
-                        last_analyzed_at
-                    FROM places
-                    ORDER BY last_analyzed_at DESC
-                    LIMIT %s
-                    """,
+                    _SQL_LIST_PLACES_PG,
                     (int(limit),),
                 )
                 rows = cur.fetchall() or []
@@ -339,50 +893,15 @@ def list_places(
         finally:
             conn.close()
 
-    conn = _get_connection(db_path)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT
-                id,
-                canonical_url,
-                display_name,
-                address,
-                google_rating,
-                user_ratings_total,
-                last_overall_score,
-                total_reviews_analyzed,
-                last_analyzed_at
-            FROM places
-            ORDER BY datetime(last_analyzed_at) DESC
-            LIMIT ?
-            """,
-            (int(limit),),
-        )
-        rows = cur.fetchall()
-        items: List[Dict[str, Any]] = []
-        for row in rows:
-            # sqlite3.Row behaves like a mapping
-            items.append(
-                {
-                    "id": row["id"],
-                    "canonical_url": row["canonical_url"],
-                    "display_name": row["display_name"],
-                    "address": row["address"],
-                    "google_rating": row["google_rating"],
-                    "user_ratings_total": row["user_ratings_total"],
-                    "last_overall_score": row["last_overall_score"],
-                    "total_reviews_analyzed": row["total_reviews_analyzed"],
-                    "last_analyzed_at": row["last_analyzed_at"],
-                }
-            )
-        return items
-    finally:
-        conn.close()
-
-
-__all__ = ["init_place_db", "record_place_from_analysis", "list_places"]
+    conn = _get_ro_connection(db_path)
+    cur = conn.cursor()
+    cur.row_factory = None
+    cur.execute(
+        _SQL_LIST_PLACES_SQLITE,
+        (int(limit),),
+    )
+    # The SELECT list already uses the output key names.
+    return _fetch_dicts(cur)
 
 
 def upsert_catalog_place(
@@ -406,48 +925,13 @@ def upsert_catalog_place(
     if not tag or not canonical_url:
         return
 
-    now_dt = datetime.now(timezone.utc)
-
     if _use_postgres_places():
+        now_dt = datetime.now(timezone.utc)
         conn = _pg_connect()
         try:
             with conn.cursor() as cur:
                 cur.execute(
-                    """
-                    INSERT INTO place_catalog (
-                        tag,
-                        canonical_url,
-                        maps_url,
-                        place_id,
-                        name,
-                        address,
-                        lat,
-                        lng,
-                        google_rating,
-                        user_ratings_total,
-                        source_query,
-                        discovered_at,
-                        last_seen_at,
-                        last_analyzed_at,
-                        last_analyze_status,
-                        last_error
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (tag, canonical_url) DO UPDATE SET
-                        maps_url = COALESCE(EXCLUDED.maps_url, place_catalog.maps_url),
-                        place_id = COALESCE(EXCLUDED.place_id, place_catalog.place_id),
-                        name = COALESCE(EXCLUDED.name, place_catalog.name),
-                        address = COALESCE(EXCLUDED.address, place_catalog.address),
-                        lat = COALESCE(EXCLUDED.lat, place_catalog.lat),
-                        lng = COALESCE(EXCLUDED.lng, place_catalog.lng),
-                        google_rating = COALESCE(EXCLUDED.google_rating, place_catalog.google_rating),
-                        user_ratings_total = COALESCE(EXCLUDED.user_ratings_total, place_catalog.user_ratings_total),
-                        source_query = COALESCE(EXCLUDED.source_query, place_catalog.source_query),
-                        last_seen_at = EXCLUDED.last_seen_at,
-                        last_analyzed_at = COALESCE(EXCLUDED.last_analyzed_at, place_catalog.last_analyzed_at),
-                        last_analyze_status = COALESCE(EXCLUDED.last_analyze_status, place_catalog.last_analyze_status),
-                        last_error = COALESCE(EXCLUDED.last_error, place_catalog.last_error)
-                    """,
+                    _SQL_UPSERT_CATALOG_PG,
                     (
                         tag,
                         canonical_url,
@@ -472,46 +956,10 @@ def upsert_catalog_place(
             conn.close()
         return
 
-    now = now_dt.isoformat()
-    conn = _get_connection(db_path)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO place_catalog (
-                tag,
-                canonical_url,
-                maps_url,
-                place_id,
-                name,
-                address,
-                lat,
-                lng,
-                google_rating,
-                user_ratings_total,
-                source_query,
-                discovered_at,
-                last_seen_at,
-                last_analyzed_at,
-                last_analyze_status,
-                last_error
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(tag, canonical_url) DO UPDATE SET
-                maps_url = COALESCE(excluded.maps_url, place_catalog.maps_url),
-                place_id = COALESCE(excluded.place_id, place_catalog.place_id),
-                name = COALESCE(excluded.name, place_catalog.name),
-                address = COALESCE(excluded.address, place_catalog.address),
-                lat = COALESCE(excluded.lat, place_catalog.lat),
-                lng = COALESCE(excluded.lng, place_catalog.lng),
-                google_rating = COALESCE(excluded.google_rating, place_catalog.google_rating),
-                user_ratings_total = COALESCE(excluded.user_ratings_total, place_catalog.user_ratings_total),
-                source_query = COALESCE(excluded.source_query, place_catalog.source_query),
-                last_seen_at = excluded.last_seen_at,
-                last_analyzed_at = COALESCE(excluded.last_analyzed_at, place_catalog.last_analyzed_at),
-                last_analyze_status = COALESCE(excluded.last_analyze_status, place_catalog.last_analyze_status),
-                last_error = COALESCE(excluded.last_error, place_catalog.last_error)
-            """,
+    now, now_ms = _utc_now_iso_ms()
+    with _write_scope(None, db_path) as conn:
+        conn.execute(
+            _SQL_UPSERT_CATALOG_SQLITE,
             (
                 tag,
                 canonical_url,
@@ -529,11 +977,89 @@ def upsert_catalog_place(
                 last_analyzed_at,
                 last_analyze_status,
                 last_error,
+                now_ms,
             ),
         )
-        conn.commit()
-    finally:
-        conn.close()
+
+
+def upsert_catalog_places_bulk(
+    *,
+    tag: str,
+    items: List[Dict[str, Any]],
+    db_path: Optional[str] = None,
+) -> int:
+    """
+    Bulk version of `upsert_catalog_place` for one tag (e.g. a district discovery batch).
+
+    Each item is a dict with the same keys as `upsert_catalog_place`'s keyword arguments
+    (`canonical_url` required). Items repeating a canonical_url are merged in order with
+    the same COALESCE rules the per-row upsert applies, so the result matches calling
+    `upsert_catalog_place` once per item.
+
+    Postgres streams the rows with COPY into a temp table and merges them with a single
+    INSERT ... SELECT ... ON CONFLICT; SQLite runs one executemany inside one transaction.
+
+    Returns the number of distinct catalog rows written.
+    """
+    if not tag or not items:
+        return 0
+
+    merged: Dict[str, Dict[str, Any]] = {}
+    for it in items:
+        canonical_url = it.get("canonical_url")
+        if not canonical_url:
+            continue
+        prev = merged.get(canonical_url)
+        if prev is None:
+            merged[canonical_url] = dict(it)
+        else:
+            prev.update({k: v for k, v in it.items() if v is not None})
+    if not merged:
+        return 0
+
+    if _use_postgres_places():
+        now: Any = datetime.now(timezone.utc)
+    else:
+        now, now_ms = _utc_now_iso_ms()
+    rows = [
+        (
+            tag,
+            canonical_url,
+            it.get("maps_url"),
+            it.get("place_id"),
+            it.get("name"),
+            it.get("address"),
+            it.get("lat"),
+            it.get("lng"),
+            it.get("google_rating"),
+            it.get("user_ratings_total"),
+            it.get("source_query"),
+            now,
+            now,
+            it.get("last_analyzed_at"),
+            it.get("last_analyze_status"),
+            it.get("last_error"),
+        )
+        for canonical_url, it in merged.items()
+    ]
+
+    if _use_postgres_places():
+        conn = _pg_connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(_SQL_CREATE_TMP_CATALOG_PG)
+                with cur.copy(_SQL_COPY_TMP_CATALOG_PG) as cp:
+                    for row in rows:
+                        cp.write_row(row)
+                cur.execute(_SQL_MERGE_TMP_CATALOG_PG)
+            conn.commit()
+        finally:
+            conn.close()
+        return len(rows)
+
+    with _write_scope(None, db_path) as conn:
+        conn.executemany(_SQL_UPSERT_CATALOG_SQLITE, [row + (now_ms,) for row in rows])
+    return len(rows)
 
 
 def list_catalog_places(
@@ -547,34 +1073,11 @@ def list_catalog_places(
     limit = max(1, min(int(limit), 50000))
 
     if _use_postgres_places():
-        conn = _pg_connect()
+        conn = _pg_connect(autocommit=True)
         try:
             with conn.cursor() as cur:
                 cur.execute(
-                    """
-                    SELECT
-                        id,
-                        tag,
-                        canonical_url,
-                        maps_url,
-                        place_id,
-                        name,
-                        address,
-                        lat,
-                        lng,
-                        google_rating,
-                        user_ratings_total,
-                        source_query,
-                        discovered_at,
-                        last_seen_at,
-                        last_analyzed_at,
-                        last_analyze_status,
-                        last_error
-                    FROM place_catalog
-                    WHERE tag = %s
-                    ORDER BY last_seen_at DESC
-                    LIMIT %s
-                    """,
+                    _SQL_LIST_CATALOG_PG,
                     (tag, limit),
                 )
                 rows = cur.fetchall() or []
@@ -590,43 +1093,14 @@ def list_catalog_places(
         finally:
             conn.close()
 
-    conn = _get_connection(db_path)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT
-                id,
-                tag,
-                canonical_url,
-                maps_url,
-                place_id,
-                name,
-                address,
-                lat,
-                lng,
-                google_rating,
-                user_ratings_total,
-                source_query,
-                discovered_at,
-                last_seen_at,
-                last_analyzed_at,
-                last_analyze_status,
-                last_error
-            FROM place_catalog
-            WHERE tag = ?
-            ORDER BY datetime(last_seen_at) DESC
-            LIMIT ?
-            """,
-            (tag, limit),
-        )
-        rows = cur.fetchall()
-        items: List[Dict[str, Any]] = []
-        for row in rows:
-            items.append({k: row[k] for k in row.keys()})
-        return items
-    finally:
-        conn.close()
+    conn = _get_ro_connection(db_path)
+    cur = conn.cursor()
+    cur.row_factory = None
+    cur.execute(
+        _SQL_LIST_CATALOG_SQLITE,
+        (tag, limit),
+    )
+    return _fetch_dicts(cur)
 
 
 def list_catalog_with_analysis(
@@ -637,7 +1111,7 @@ def list_catalog_with_analysis(
     db_path: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
-    Return catalog rows for a tag, joined with lightweight analysis metadata from `places`.
+    Return catalog rows for a tag, with lightweight analysis metadata from `places`.
 
     This is designed for "prebuilt district lists" (e.g. xinyi) where we want to:
     - show the discovered list quickly
@@ -649,45 +1123,34 @@ def list_catalog_with_analysis(
     limit = max(1, min(int(limit), 1000))
 
     if _use_postgres_places():
-        conn = _pg_connect()
+        conn = _pg_connect(autocommit=True)
         try:
             with conn.cursor() as cur:
-                where_extra = "AND p.canonical_url IS NOT NULL" if only_analyzed else ""
+                sql = (
+                    _SQL_LIST_CATALOG_WITH_ANALYSIS_PG_ONLY_ANALYZED
+                    if only_analyzed
+                    else _SQL_LIST_CATALOG_WITH_ANALYSIS_PG_ALL
+                )
                 cur.execute(
-                    f"""
-                    SELECT
-                        c.id,
-                        c.tag,
-                        c.canonical_url,
-                        c.maps_url,
-                        c.place_id,
-                        c.name,
-                        c.address,
-                        c.lat,
-                        c.lng,
-                        c.google_rating,
-                        c.user_ratings_total,
-                        c.source_query,
-                        c.discovered_at,
-                        c.last_seen_at,
-                        c.last_analyzed_at AS catalog_last_analyzed_at,
-                        c.last_analyze_status,
-                        c.last_error,
-                        p.display_name AS analyzed_display_name,
-                        p.last_overall_score,
-                        p.total_reviews_analyzed,
-                        p.last_analyzed_at AS analyzed_last_analyzed_at
-                    FROM place_catalog c
-                    LEFT JOIN places p
-                        ON p.canonical_url = c.canonical_url
-                    WHERE c.tag = %s
-                      {where_extra}
-                    ORDER BY c.last_seen_at DESC
-                    LIMIT %s
-                    """,
+                    sql,
                     (tag, limit),
                 )
                 rows = cur.fetchall() or []
+                if rows and not only_analyzed:
+                    cur.execute(
+                        _SQL_PLACE_ANALYSIS_BY_URLS_PG,
+                        ([row["canonical_url"] for row in rows],),
+                    )
+                    by_url = {
+                        r["canonical_url"]: (
+                            r["display_name"],
+                            r["last_overall_score"],
+                            r["total_reviews_analyzed"],
+                            r["last_analyzed_at"],
+                        )
+                        for r in cur.fetchall()
+                    }
+                    _merge_place_analysis(rows, by_url)
                 items: List[Dict[str, Any]] = []
                 for row in rows:
                     d = dict(row)
@@ -706,53 +1169,34 @@ def list_catalog_with_analysis(
         finally:
             conn.close()
 
-    conn = _get_connection(db_path)
-    try:
-        cur = conn.cursor()
-        where_extra = "AND p.canonical_url IS NOT NULL" if only_analyzed else ""
-        cur.execute(
-            f"""
-            SELECT
-                c.id,
-                c.tag,
-                c.canonical_url,
-                c.maps_url,
-                c.place_id,
-                c.name,
-                c.address,
-                c.lat,
-                c.lng,
-                c.google_rating,
-                c.user_ratings_total,
-                c.source_query,
-                c.discovered_at,
-                c.last_seen_at,
-                c.last_analyzed_at AS catalog_last_analyzed_at,
-                c.last_analyze_status,
-                c.last_error,
-                p.display_name AS analyzed_display_name,
-                p.last_overall_score,
-                p.total_reviews_analyzed,
-                p.last_analyzed_at AS analyzed_last_analyzed_at
-            FROM place_catalog c
-            LEFT JOIN places p
-                ON p.canonical_url = c.canonical_url
-            WHERE c.tag = ?
-              {where_extra}
-            ORDER BY datetime(c.last_seen_at) DESC
-            LIMIT ?
-            """,
-            (tag, limit),
-        )
-        rows = cur.fetchall()
-        items: List[Dict[str, Any]] = []
-        for row in rows:
-            d = {k: row[k] for k in row.keys()}
-            d["analysis_available"] = bool(d.get("analyzed_last_analyzed_at"))
-            items.append(d)
-        return items
-    finally:
-        conn.close()
+    conn = _get_ro_connection(db_path)
+    cur = conn.cursor()
+    cur.row_factory = None
+    sql = (
+        _SQL_LIST_CATALOG_WITH_ANALYSIS_SQLITE_ONLY_ANALYZED
+        if only_analyzed
+        else _SQL_LIST_CATALOG_WITH_ANALYSIS_SQLITE_ALL
+    )
+    cur.execute(
+        sql,
+        (tag, limit),
+    )
+    items = _fetch_dicts(cur)
+    if items and not only_analyzed:
+        urls = [d["canonical_url"] for d in items]
+        by_url: Dict[str, Tuple[Any, ...]] = {}
+        for i in range(0, len(urls), _SQLITE_IN_CHUNK):
+            chunk = urls[i : i + _SQLITE_IN_CHUNK]
+            cur.execute(
+                _SQL_PLACE_ANALYSIS_BY_URLS_SQLITE.format(placeholders=", ".join("?" * len(chunk))),
+                chunk,
+            )
+            for row in cur.fetchall():
+                by_url[row[0]] = row[1:]
+        _merge_place_analysis(items, by_url)
+    for d in items:
+        d["analysis_available"] = bool(d["analyzed_last_analyzed_at"])
+    return items
 
 
 def update_catalog_analyze_status(
@@ -762,23 +1206,19 @@ def update_catalog_analyze_status(
     status: str,
     error: Optional[str] = None,
     db_path: Optional[str] = None,
+    conn: Optional[sqlite3.Connection] = None,
 ) -> None:
+    """SQLite: pass `conn` from `begin_batch()` to join that transaction."""
     if not tag or not canonical_url:
         return
-    now_dt = datetime.now(timezone.utc)
 
     if _use_postgres_places():
+        now_dt = datetime.now(timezone.utc)
         conn = _pg_connect()
         try:
             with conn.cursor() as cur:
                 cur.execute(
-                    """
-                    UPDATE place_catalog
-                    SET last_analyzed_at = %s,
-                        last_analyze_status = %s,
-                        last_error = %s
-                    WHERE tag = %s AND canonical_url = %s
-                    """,
+                    _SQL_UPDATE_CATALOG_STATUS_PG,
                     (now_dt, status, error, tag, canonical_url),
                 )
             conn.commit()
@@ -786,23 +1226,83 @@ def update_catalog_analyze_status(
             conn.close()
         return
 
-    now = now_dt.isoformat()
-    conn = _get_connection(db_path)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            UPDATE place_catalog
-            SET last_analyzed_at = ?,
-                last_analyze_status = ?,
-                last_error = ?
-            WHERE tag = ? AND canonical_url = ?
-            """,
+    now, _ = _utc_now_iso_ms()
+    with _write_scope(conn, db_path) as conn:
+        conn.execute(
+            _SQL_UPDATE_CATALOG_STATUS_SQLITE,
             (now, status, error, tag, canonical_url),
         )
-        conn.commit()
-    finally:
-        conn.close()
+
+
+class CatalogUpdateBatch:
+    """
+    Handle yielded by `batch_catalog_updates()`.
+
+    SQLite: each `update()` runs `update_catalog_analyze_status` inside the block's single
+    transaction. Postgres: rows are queued on the block's one connection and flushed with
+    `executemany` every `PG_FLUSH_EVERY` updates.
+    """
+
+    PG_FLUSH_EVERY = 500
+
+    def __init__(self, conn: Any, *, pg: bool = False) -> None:
+        self._conn = conn
+        self._pg = pg
+        self._pending: List[Tuple[Any, ...]] = []
+
+    def update(
+        self,
+        tag: str,
+        canonical_url: str,
+        status: str,
+        error: Optional[str] = None,
+    ) -> None:
+        if not tag or not canonical_url:
+            return
+        if not self._pg:
+            update_catalog_analyze_status(
+                tag=tag, canonical_url=canonical_url, status=status, error=error, conn=self._conn
+            )
+            return
+        self._pending.append((datetime.now(timezone.utc), status, error, tag, canonical_url))
+        if len(self._pending) >= self.PG_FLUSH_EVERY:
+            self._flush_pg()
+
+    def _flush_pg(self) -> None:
+        if not self._pending:
+            return
+        with self._conn.cursor() as cur:
+            cur.executemany(_SQL_UPDATE_CATALOG_STATUS_PG, self._pending)
+        self._pending = []
+
+
+@contextmanager
+def batch_catalog_updates(db_path: Optional[str] = None) -> Iterator[CatalogUpdateBatch]:
+    """
+    Apply many catalog status updates in one transaction (one commit instead of N), e.g. at
+    the end of a district analysis run:
+
+        with batch_catalog_updates() as batch:
+            for url, status in results:
+                batch.update(tag, url, status)
+
+    Commits on normal exit, rolls back if the block raises. On SQLite this is
+    `_write_scope()`, so it also joins an enclosing `begin_batch()` transaction.
+    """
+    if _use_postgres_places():
+        conn = _pg_connect()
+        try:
+            batch = CatalogUpdateBatch(conn, pg=True)
+            yield batch
+            batch._flush_pg()
+            conn.commit()
+        finally:
+            # Closing without commit discards the transaction.
+            conn.close()
+        return
+
+    with _write_scope(None, db_path) as conn:
+        yield CatalogUpdateBatch(conn)
 
 
 __all__ = [
@@ -813,5 +1313,8 @@ __all__ = [
     "list_catalog_places",
     "list_catalog_with_analysis",
     "update_catalog_analyze_status",
+    "upsert_catalog_places_bulk",
+    "CatalogUpdateBatch",
+    "batch_catalog_updates",
 ]
 
@@ -1,8 +1,92 @@
+import hashlib
+import itertools
 import json
-from datetime import datetime, timezone
+import sqlite3
 from typing import Any, Dict, List, Optional, Tuple
 
-from .cache_store import _get_connection
+from .cache_store import (
+    _get_connection,
+    _get_ro_connection,
+    _utc_now_iso_ms,
+    _write_scope,
+    _write_transaction,
+)
+
+# Hot statements are module-level constants so every call hands sqlite3 the same SQL text
+# (its per-connection statement cache is keyed on it). The IN (...) lookups are templates:
+# one cached statement per distinct chunk size.
+_SQL_UPSERT_REVIEW = """
+INSERT INTO place_reviews (
+    canonical_url,
+    review_id,
+    published_at,
+    stars,
+    text,
+    reviewer_name,
+    has_photo,
+    photo_urls_json,
+    raw_json,
+    scraped_at,
+    first_seen_at,
+    last_seen_at
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(canonical_url, review_id) DO UPDATE SET
+    last_seen_at = excluded.last_seen_at,
+    scraped_at = excluded.scraped_at,
+    raw_json = excluded.raw_json
+"""
+
+_SQL_EXISTING_REVIEW_IDS = (
+    "SELECT review_id FROM place_reviews WHERE canonical_url = ? AND review_id IN ({placeholders})"
+)
+
+_SQL_LIST_RECENT_RAW = """
+SELECT
+    id,
+    -- bytes: skips sqlite3's per-row UTF-8 -> str decode; the JSON decoder takes bytes.
+    CAST(raw_json AS BLOB) AS raw_json
+FROM place_reviews
+WHERE canonical_url = ?
+-- ISO8601 dates sort by text; anything else (e.g. publishAt's "3 weeks ago") maps to
+-- NULL and sorts last, as datetime() did. Must match idx_place_reviews_url_pub exactly.
+ORDER BY CASE WHEN published_at GLOB '[0-9][0-9][0-9][0-9]-*' THEN published_at END DESC, id DESC
+LIMIT ?
+"""
+
+_SQL_REVIEW_FALLBACK_BY_IDS = (
+    "SELECT id, review_id, published_at, stars, text, reviewer_name FROM place_reviews "
+    "WHERE id IN ({placeholders})"
+)
+
+_SQL_REVIEW_SUMMARY = """
+SELECT review_count, newest_published_at
+FROM place_review_stats
+WHERE canonical_url = ?
+"""
+
+# review_id IN (...) lookups are chunked to stay under SQLite's 999 bound-parameter limit.
+_IN_CHUNK = 500
+
+# Compact JSON for the stored review payloads (no spaces after ',' / ':').
+_JSON_SEPARATORS = (",", ":")
+
+# Optional faster decoder for list_recent_reviews (not a hard dependency).
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(data: bytes) -> Any:
+    # Both decoders accept the raw UTF-8 bytes the query returns.
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # json.dumps can emit NaN / >64-bit ints, which orjson rejects.
+            pass
+    return json.loads(data)
 
 
 def init_review_db(db_path: Optional[str] = None) -> None:
@@ -36,11 +120,75 @@ def init_review_db(db_path: Optional[str] = None) -> None:
             )
             """
         )
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_place_reviews_url ON place_reviews(canonical_url)")
+        # list_recent_reviews walks this index in order (no sort step). It also serves every
+        # canonical_url lookup, so the older single-column and ascending indexes are dropped.
         cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_place_reviews_published ON place_reviews(canonical_url, published_at)"
+            "CREATE INDEX IF NOT EXISTS idx_place_reviews_url_pub ON place_reviews("
+            "canonical_url, "
+            "(CASE WHEN published_at GLOB '[0-9][0-9][0-9][0-9]-*' THEN published_at END) DESC, "
+            "id DESC)"
         )
-        conn.commit()
+        cur.execute("DROP INDEX IF EXISTS idx_place_reviews_url")
+        cur.execute("DROP INDEX IF EXISTS idx_place_reviews_published")
+
+        # Per-URL count + newest published_at, kept current by triggers so
+        # get_reviews_summary is a primary-key lookup instead of a COUNT over the URL's rows.
+        # Upserts that hit an existing review run as UPDATEs (published_at untouched), so
+        # only INSERT and DELETE need triggers.
+        with _write_transaction(conn):
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS place_review_stats (
+                    canonical_url TEXT PRIMARY KEY,
+                    review_count INTEGER NOT NULL DEFAULT 0,
+                    newest_published_at TEXT
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS trg_place_reviews_stats_ins
+                AFTER INSERT ON place_reviews
+                BEGIN
+                    INSERT INTO place_review_stats (canonical_url, review_count, newest_published_at)
+                    VALUES (NEW.canonical_url, 1, NEW.published_at)
+                    ON CONFLICT(canonical_url) DO UPDATE SET
+                        review_count = review_count + 1,
+                        newest_published_at = CASE
+                            WHEN excluded.newest_published_at IS NULL THEN newest_published_at
+                            WHEN newest_published_at IS NULL
+                                OR excluded.newest_published_at > newest_published_at
+                                THEN excluded.newest_published_at
+                            ELSE newest_published_at
+                        END;
+                END
+                """
+            )
+            cur.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS trg_place_reviews_stats_del
+                AFTER DELETE ON place_reviews
+                BEGIN
+                    UPDATE place_review_stats SET
+                        review_count = review_count - 1,
+                        newest_published_at = (
+                            SELECT MAX(published_at) FROM place_reviews
+                            WHERE canonical_url = OLD.canonical_url
+                        )
+                    WHERE canonical_url = OLD.canonical_url;
+                END
+                """
+            )
+            # First run on an existing DB: seed the stats from the stored reviews.
+            cur.execute(
+                """
+                INSERT INTO place_review_stats (canonical_url, review_count, newest_published_at)
+                SELECT canonical_url, COUNT(*), MAX(published_at)
+                FROM place_reviews
+                WHERE NOT EXISTS (SELECT 1 FROM place_review_stats)
+                GROUP BY canonical_url
+                """
+            )
     finally:
         conn.close()
 
@@ -58,115 +206,124 @@ def upsert_place_reviews(
     canonical_url: str,
     reviews: List[Dict[str, Any]],
     db_path: Optional[str] = None,
+    conn: Optional[sqlite3.Connection] = None,
 ) -> Tuple[int, int]:
     """
     Insert new reviews and keep old ones.
 
+    Pass ``conn`` from ``begin_batch()`` to join that transaction instead of committing here.
+
     Returns:
       (inserted_new, total_processed)
     """
     if not canonical_url or not reviews:
         return (0, 0)
 
-    # Correctly compute inserted_new by using INSERT OR IGNORE (rowcount reflects only new rows),
-    # then UPDATE last_seen/scraped for both new+existing.
-    return _insert_ignore_then_touch_seen(canonical_url=canonical_url, reviews=reviews, db_path=db_path)
+    # One UPSERT per review (insert new, touch last_seen/scraped for existing); inserted_new
+    # is computed from the review_ids that were already stored.
+    return _insert_ignore_then_touch_seen(
+        canonical_url=canonical_url, reviews=reviews, db_path=db_path, conn=conn
+    )
 
 
 def _insert_ignore_then_touch_seen(
-    *, canonical_url: str, reviews: List[Dict[str, Any]], db_path: Optional[str] = None
+    *,
+    canonical_url: str,
+    reviews: List[Dict[str, Any]],
+    db_path: Optional[str] = None,
+    conn: Optional[sqlite3.Connection] = None,
 ) -> Tuple[int, int]:
     """
-    Correctly compute inserted_new by using INSERT OR IGNORE (so rowcount reflects only new rows),
-    then UPDATE last_seen/scraped for both new+existing.
+    Insert new reviews and refresh last_seen/scraped/raw_json of existing ones with a single
+    INSERT ... ON CONFLICT DO UPDATE per review.
+
+    An UPSERT's rowcount counts updates too, so inserted_new is computed up front: the
+    batch's review_ids minus those already stored (looked up inside the same write
+    transaction, so nothing can slip in between).
     """
     if not canonical_url or not reviews:
         return (0, 0)
 
-    now = datetime.now(timezone.utc).isoformat()
-    inserted = 0
+    now, _ = _utc_now_iso_ms()
     processed = 0
-    conn = _get_connection(db_path)
-    try:
-        cur = conn.cursor()
-        for r in reviews:
-            if not isinstance(r, dict):
-                continue
-            processed += 1
-            review_id = (r.get("reviewId") or r.get("review_id") or r.get("id") or "").strip()
-            if not review_id:
-                fallback = (r.get("reviewUrl") or "") or (
-                    f"{r.get('publishedAtDate') or r.get('publishAt')}-{(r.get('text') or '')[:80]}"
-                )
-                review_id = f"fallback:{abs(hash(str(fallback)))}"
-
-            published_at = _to_iso(r.get("publishedAtDate") or r.get("publishAt") or r.get("reviewDate"))
-            stars = r.get("stars") or r.get("rating") or r.get("reviewRating")
-            try:
-                stars_val = float(stars) if stars is not None else None
-            except Exception:
-                stars_val = None
-            text = r.get("text") or r.get("reviewText") or ""
-            reviewer_name = r.get("name") or r.get("reviewerName") or None
-            photo_urls = r.get("reviewImageUrls") or r.get("photos") or []
-            if not isinstance(photo_urls, list):
-                photo_urls = []
-            photo_urls = [p for p in photo_urls if isinstance(p, str) and p.startswith("http")][:8]
-            has_photo = 1 if len(photo_urls) > 0 else 0
-            try:
-                raw_json = json.dumps(r, ensure_ascii=False)
-            except Exception:
-                raw_json = json.dumps(str(r), ensure_ascii=False)
+    # review_id -> row; a repeated id keeps its first row but takes the later raw_json,
+    # which is what upserting every occurrence in order would store.
+    rows_by_id: Dict[str, Tuple[Any, ...]] = {}
+    dumps = json.dumps
+    for r in reviews:
+        if not isinstance(r, dict):
+            continue
+        processed += 1
+        _get = r.get
+        text = _get("text") or _get("reviewText") or ""
+        review_id = (_get("reviewId") or _get("review_id") or _get("id") or "").strip()
+        if not review_id:
+            fallback = _get("reviewUrl") or (
+                f"{_get('publishedAtDate') or _get('publishAt')}-{(_get('text') or '')[:80]}"
+            )
+            # Content digest, stable across processes (built-in hash() is salted per process,
+            # so the same review got a new id, and a duplicate row, after every restart).
+            digest = hashlib.blake2b(str(fallback).encode("utf-8"), digest_size=16).hexdigest()
+            review_id = f"fallback:{digest}"
 
-            cur.execute(
-                """
-                INSERT OR IGNORE INTO place_reviews (
-                    canonical_url,
-                    review_id,
-                    published_at,
-                    stars,
-                    text,
-                    reviewer_name,
-                    has_photo,
-                    photo_urls_json,
-                    raw_json,
-                    scraped_at,
-                    first_seen_at,
-                    last_seen_at
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    canonical_url,
-                    review_id,
-                    published_at,
-                    stars_val,
-                    str(text) if text is not None else "",
-                    reviewer_name,
-                    has_photo,
-                    json.dumps(photo_urls, ensure_ascii=False) if photo_urls else None,
-                    raw_json,
-                    now,
-                    now,
-                    now,
-                ),
+        published_at = _to_iso(_get("publishedAtDate") or _get("publishAt") or _get("reviewDate"))
+        stars = _get("stars") or _get("rating") or _get("reviewRating")
+        try:
+            stars_val = float(stars) if stars is not None else None
+        except Exception:
+            stars_val = None
+        reviewer_name = _get("name") or _get("reviewerName") or None
+        photo_urls = _get("reviewImageUrls") or _get("photos")
+        if photo_urls and isinstance(photo_urls, list):
+            # Stop at the 8th valid URL instead of filtering the whole list first.
+            photo_urls = list(
+                itertools.islice((p for p in photo_urls if isinstance(p, str) and p.startswith("http")), 8)
             )
-            if (cur.rowcount or 0) > 0:
-                inserted += 1
+        else:
+            photo_urls = None
+        try:
+            raw_json = dumps(r, ensure_ascii=False, separators=_JSON_SEPARATORS)
+        except Exception:
+            raw_json = dumps(str(r), ensure_ascii=False, separators=_JSON_SEPARATORS)
+
+        prev = rows_by_id.get(review_id)
+        if prev is not None:
+            rows_by_id[review_id] = prev[:8] + (raw_json,) + prev[9:]
+            continue
+        rows_by_id[review_id] = (
+            canonical_url,
+            review_id,
+            published_at,
+            stars_val,
+            text if isinstance(text, str) else str(text),
+            reviewer_name,
+            1 if photo_urls else 0,
+            dumps(photo_urls, ensure_ascii=False, separators=_JSON_SEPARATORS) if photo_urls else None,
+            raw_json,
+            now,
+            now,
+            now,
+        )
+
+    if not rows_by_id:
+        return (0, processed)
 
-            # Touch seen markers for both new/existing
+    # One explicit transaction (the connection is autocommit) around lookup + upsert, or the
+    # caller's begin_batch() transaction when conn is given.
+    with _write_scope(conn, db_path) as conn:
+        cur = conn.cursor()
+        batch_ids = list(rows_by_id)
+        existing = set()
+        for i in range(0, len(batch_ids), _IN_CHUNK):
+            chunk = batch_ids[i : i + _IN_CHUNK]
             cur.execute(
-                """
-                UPDATE place_reviews
-                SET last_seen_at = ?, scraped_at = ?, raw_json = ?
-                WHERE canonical_url = ? AND review_id = ?
-                """,
-                (now, now, raw_json, canonical_url, review_id),
+                _SQL_EXISTING_REVIEW_IDS.format(placeholders=", ".join("?" * len(chunk))),
+                [canonical_url, *chunk],
             )
+            existing.update(row[0] for row in cur.fetchall())
+        inserted = len(batch_ids) - len(existing)
 
-        conn.commit()
-    finally:
-        conn.close()
+        cur.executemany(_SQL_UPSERT_REVIEW, list(rows_by_id.values()))
     return inserted, processed
 
 
@@ -179,49 +336,36 @@ def list_recent_reviews(
     if not canonical_url:
         return []
     limit = max(1, min(int(limit), 500))
-    conn = _get_connection(db_path)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT
-                review_id,
-                published_at,
-                stars,
-                text,
-                reviewer_name,
-                has_photo,
-                photo_urls_json,
-                raw_json
-            FROM place_reviews
-            WHERE canonical_url = ?
-            ORDER BY datetime(published_at) DESC, id DESC
-            LIMIT ?
-            """,
-            (canonical_url, limit),
-        )
-        rows = cur.fetchall()
-        out: List[Dict[str, Any]] = []
-        for row in rows:
-            try:
-                raw = json.loads(row["raw_json"])
-                if isinstance(raw, dict):
-                    out.append(raw)
-                    continue
-            except Exception:
-                pass
-            out.append(
-                {
-                    "reviewId": row["review_id"],
-                    "publishedAtDate": row["published_at"],
-                    "stars": row["stars"],
-                    "text": row["text"],
-                    "name": row["reviewer_name"],
-                }
-            )
-        return out
-    finally:
-        conn.close()
+    conn = _get_ro_connection(db_path)
+    cur = conn.cursor()
+    # Only raw_json is needed on the common path; the scalar columns are fetched in a
+    # second query for the (rare) rows whose payload doesn't decode to a dict.
+    cur.execute(_SQL_LIST_RECENT_RAW, (canonical_url, limit))
+    out: List[Optional[Dict[str, Any]]] = []
+    fallback_pos: Dict[int, int] = {}  # row id -> index in out
+    for row_id, raw_json in cur.fetchall():
+        try:
+            raw = _json_loads(raw_json)
+            if isinstance(raw, dict):
+                out.append(raw)
+                continue
+        except Exception:
+            pass
+        fallback_pos[row_id] = len(out)
+        out.append(None)
+
+    if fallback_pos:
+        ids = list(fallback_pos)
+        cur.execute(_SQL_REVIEW_FALLBACK_BY_IDS.format(placeholders=", ".join("?" * len(ids))), ids)
+        for row in cur.fetchall():
+            out[fallback_pos[row["id"]]] = {
+                "reviewId": row["review_id"],
+                "publishedAtDate": row["published_at"],
+                "stars": row["stars"],
+                "text": row["text"],
+                "name": row["reviewer_name"],
+            }
+    return [r for r in out if r is not None]
 
 
 def get_reviews_summary(
@@ -234,23 +378,13 @@ def get_reviews_summary(
     """
     if not canonical_url:
         return {"count": 0, "newest_published_at": None}
-    conn = _get_connection(db_path)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT COUNT(*) AS c, MAX(published_at) AS newest
-            FROM place_reviews
-            WHERE canonical_url = ?
-            """,
-            (canonical_url,),
-        )
-        row = cur.fetchone()
-        if not row:
-            return {"count": 0, "newest_published_at": None}
-        return {"count": int(row["c"] or 0), "newest_published_at": row["newest"]}
-    finally:
-        conn.close()
+    conn = _get_ro_connection(db_path)
+    cur = conn.cursor()
+    cur.execute(_SQL_REVIEW_SUMMARY, (canonical_url,))
+    row = cur.fetchone()
+    if not row:
+        return {"count": 0, "newest_published_at": None}
+    return {"count": int(row["review_count"] or 0), "newest_published_at": row["newest_published_at"]}
 
 
 __all__ = ["init_review_db", "upsert_place_reviews", "list_recent_reviews", "get_reviews_summary"]
@@ -1,8 +1,9 @@
+import heapq
 import threading
 import time
 import uuid
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 from services.url_normalizer import normalize_input_to_canonical, canonicalize
 from services.apify_client import scrape_reviews
@@ -14,35 +15,61 @@ _EXECUTOR = ThreadPoolExecutor(max_workers=3)
 # 任務保留時間（秒）：2 小時
 TASK_TTL_SECONDS = 2 * 60 * 60
 
-# 內部狀態
-_tasks_by_id: Dict[str, Dict[str, Any]] = {}
+# 內部狀態：任務依 task_id 分散到 8 個 shard，各自一把鎖，
+# 不同任務的狀態更新 / 輪詢不會互相搶同一把鎖。
+_SHARD_COUNT = 8
+_task_shards: Tuple[Dict[str, Dict[str, Any]], ...] = tuple({} for _ in range(_SHARD_COUNT))
+_shard_locks: Tuple[threading.Lock, ...] = tuple(threading.Lock() for _ in range(_SHARD_COUNT))
+
+# dedupe 映射另有一把鎖；需要同時持有時，一律先取 _dedupe_lock 再取 shard 鎖。
 _running_by_dedupe_key: Dict[str, str] = {}  # dedupe_key -> task_id
-_lock = threading.Lock()
+_dedupe_lock = threading.Lock()
+
+# 到期時間 min-heap：(created_at + TTL, task_id)，清理時只需彈出真正過期的任務
+_expiry_heap: List[Tuple[float, str]] = []
+_expiry_lock = threading.Lock()
+# 狀態輪詢很頻繁（約每 0.5 秒一次）；清理最多每秒做一次
+_CLEANUP_MIN_INTERVAL_SECONDS = 1.0
+_last_cleanup_ts = 0.0
 
 
 def _now_ts() -> float:
     return time.time()
 
 
+def _shard_index(task_id: str) -> int:
+    return hash(task_id) & (_SHARD_COUNT - 1)
+
+
+def _unmap_dedupe_keys(task_ids: Set[str]) -> None:
+    """移除指向這些 task_id 的 dedupe 映射（呼叫端需持有 _dedupe_lock）。"""
+    keys_to_delete = [dk for dk, tid in _running_by_dedupe_key.items() if tid in task_ids]
+    for dk in keys_to_delete:
+        _running_by_dedupe_key.pop(dk, None)
+
+
 def _cleanup_expired() -> None:
     """移除已超過 TTL 的任務，同時清掉對應 dedupe mapping。"""
+    global _last_cleanup_ts
     now = _now_ts()
-    with _lock:
-        expired_task_ids = [
-            tid
-            for tid, task in _tasks_by_id.items()
-            if now - float(task.get("created_at", now)) > TASK_TTL_SECONDS
-        ]
+    # 鎖外先檢查：距上次清理不到 1 秒就直接返回
+    if now - _last_cleanup_ts < _CLEANUP_MIN_INTERVAL_SECONDS:
+        return
 
-        for tid in expired_task_ids:
-            # 先移除 dedupe 映射
-            keys_to_delete = [
-                dk for dk, mapped_tid in _running_by_dedupe_key.items() if mapped_tid == tid
-            ]
-            for dk in keys_to_delete:
-                _running_by_dedupe_key.pop(dk, None)
+    expired_task_ids: Set[str] = set()
+    with _expiry_lock:
+        _last_cleanup_ts = now
+        while _expiry_heap and _expiry_heap[0][0] < now:
+            expired_task_ids.add(heapq.heappop(_expiry_heap)[1])
+    if not expired_task_ids:
+        return
 
-            _tasks_by_id.pop(tid, None)
+    for tid in expired_task_ids:
+        i = _shard_index(tid)
+        with _shard_locks[i]:
+            _task_shards[i].pop(tid, None)
+    with _dedupe_lock:
+        _unmap_dedupe_keys(expired_task_ids)
 
 
 def _make_task_dict(
@@ -74,8 +101,9 @@ def _make_task_dict(
 
 
 def _update_task(task_id: str, **fields: Any) -> None:
-    with _lock:
-        task = _tasks_by_id.get(task_id)
+    i = _shard_index(task_id)
+    with _shard_locks[i]:
+        task = _task_shards[i].get(task_id)
         if not task:
             return
         task.update(fields)
@@ -83,8 +111,9 @@ def _update_task(task_id: str, **fields: Any) -> None:
 
 
 def _get_task_copy(task_id: str) -> Optional[Dict[str, Any]]:
-    with _lock:
-        task = _tasks_by_id.get(task_id)
+    i = _shard_index(task_id)
+    with _shard_locks[i]:
+        task = _task_shards[i].get(task_id)
         if not task:
             return None
         return dict(task)
@@ -110,17 +139,17 @@ def submit_task(input_raw: str, mode: str = "quick", force_refresh: bool = False
     dedupe_key = f"{cache_key}:{mode}"
     now = _now_ts()
 
-    with _lock:
+    with _dedupe_lock:
         if not force_refresh:
             # 若已有同 dedupe_key 的任務且仍有效，直接回傳
             existing_task_id = _running_by_dedupe_key.get(dedupe_key)
             if existing_task_id:
-                existing = _tasks_by_id.get(existing_task_id)
+                existing = _get_task_copy(existing_task_id)
                 if existing:
                     if now - float(existing.get("created_at", now)) <= TASK_TTL_SECONDS and existing[
                         "status"
                     ] in {"pending", "running"}:
-                        return dict(existing)
+                        return existing
                     # 否則視為過期 / 結束，移除映射
                     _running_by_dedupe_key.pop(dedupe_key, None)
 
@@ -134,8 +163,12 @@ def submit_task(input_raw: str, mode: str = "quick", force_refresh: bool = False
             cache_key=cache_key,
             force_refresh=force_refresh,
         )
-        _tasks_by_id[task_id] = task
+        i = _shard_index(task_id)
+        with _shard_locks[i]:
+            _task_shards[i][task_id] = task
         _running_by_dedupe_key[dedupe_key] = task_id
+        with _expiry_lock:
+            heapq.heappush(_expiry_heap, (task["created_at"] + TASK_TTL_SECONDS, task_id))
 
     # 排程執行 worker
     _EXECUTOR.submit(_run_worker, task_id)
@@ -169,6 +202,54 @@ def get_task_result(task_id: str) -> Optional[Dict[str, Any]]:
     return entry.as_result_object()
 
 
+def _upgrade_key_from_reviews(
+    reviews: List[Dict[str, Any]],
+    cache_key: str,
+    canonical_url: str,
+    display_name: str,
+) -> Tuple[str, str, str]:
+    """
+    從評論資料找出更穩定的 (cache_key, canonical_url, display_name)。
+
+    依評論順序，第一筆帶有 url（可正規化）、placeId 或 cid 的評論決定結果；同一筆內 url 優先。
+    同一批評論通常帶著同一個店家 url：每個不同的 url 最多只 canonicalize 一次，
+    正規化失敗的 url 不會在後面的評論上重試。
+    """
+    failed_urls: Set[str] = set()
+    for r in reviews:
+        url = r.get("url") or r.get("placeUrl")
+        if url and url not in failed_urls:
+            try:
+                norm = canonicalize(url)
+            except Exception:
+                norm = None
+            if norm:
+                return (
+                    norm.get("cache_key") or cache_key,
+                    norm.get("canonical_url") or canonical_url,
+                    norm.get("display_name") or display_name,
+                )
+            failed_urls.add(url)
+
+        place_id = r.get("placeId") or r.get("place_id")
+        if place_id:
+            return f"place_id:{place_id}", canonical_url, display_name
+
+        cid = r.get("cid")
+        if cid:
+            return f"cid:{cid}", canonical_url, display_name
+
+    return cache_key, canonical_url, display_name
+
+
+def _short_review_text(r: Dict[str, Any], limit: int = 80) -> str:
+    """評論摘要：只截取前 limit 個字，text 為空時才退回 reviewText。"""
+    t = r.get("text")
+    if t:
+        return t[:limit]
+    return (r.get("reviewText") or "")[:limit]
+
+
 def _run_worker(task_id: str) -> None:
     """實際執行分析流程的 worker。"""
     task = _get_task_copy(task_id)
@@ -179,7 +260,16 @@ def _run_worker(task_id: str) -> None:
     mode = task["mode"]
     force_refresh = bool(task.get("force_refresh", False))
 
-    _update_task(task_id, status="running", progress=5, message="解析輸入中")
+    # 只在狀態轉換或即將進入耗時步驟（抓評論、LLM）前才寫回任務表；
+    # 中間幾個很快就結束的步驟先累積在 pending，合併成一次 _update_task。
+    pending: Dict[str, Any] = {}
+
+    def _flush(**fields: Any) -> None:
+        pending.update(fields)
+        _update_task(task_id, **pending)
+        pending.clear()
+
+    _flush(status="running", progress=5, message="解析輸入中")
 
     try:
         # 1) 重新正規化輸入，確保使用最新規則
@@ -188,8 +278,7 @@ def _run_worker(task_id: str) -> None:
         display_name = info.get("display_name") or task.get("display_name", "")
         cache_key = info.get("cache_key", task.get("cache_key", ""))
 
-        _update_task(
-            task_id,
+        pending.update(
             canonical_url=canonical_url,
             display_name=display_name,
             cache_key=cache_key,
@@ -202,8 +291,7 @@ def _run_worker(task_id: str) -> None:
         if not force_refresh:
             entry = get_cached_analysis(cache_key, mode)
             if entry:
-                _update_task(
-                    task_id,
+                _flush(
                     status="done",
                     progress=100,
                     message="分析完成（來自初始快取）",
@@ -212,7 +300,7 @@ def _run_worker(task_id: str) -> None:
                 return
 
         # 3) 呼叫 Apify 抓評論
-        _update_task(task_id, progress=20, message="抓取評論中")
+        _flush(progress=20, message="抓取評論中")
         # 方便驗證快取是否生效：只有實際呼叫 scrape_reviews 時才會印出這行
         print(f"[task_queue] scrape_reviews called for url={canonical_url!r}, mode={mode!r}")
         if mode == "deep":
@@ -223,39 +311,12 @@ def _run_worker(task_id: str) -> None:
         reviews = scrape_reviews(canonical_url, max_reviews=max_reviews, language="zh-TW")
 
         # 4) 嘗試從評論升級 cache_key
-        new_cache_key = cache_key
-        new_canonical_url = canonical_url
-        new_display_name = display_name
-
-        for r in reviews:
-            url = r.get("url") or r.get("placeUrl")
-            if url:
-                try:
-                    norm = canonicalize(url)
-                    if norm:
-                        if norm.get("cache_key"):
-                            new_cache_key = norm["cache_key"]
-                        if norm.get("canonical_url"):
-                            new_canonical_url = norm["canonical_url"]
-                        if norm.get("display_name"):
-                            new_display_name = norm["display_name"]
-                        break
-                except Exception:
-                    pass
-
-            place_id = r.get("placeId") or r.get("place_id")
-            if place_id:
-                new_cache_key = f"place_id:{place_id}"
-                break
-
-            cid = r.get("cid")
-            if cid:
-                new_cache_key = f"cid:{cid}"
-                break
+        new_cache_key, new_canonical_url, new_display_name = _upgrade_key_from_reviews(
+            reviews, cache_key, canonical_url, display_name
+        )
 
         final_cache_key = new_cache_key
-        _update_task(
-            task_id,
+        pending.update(
             final_cache_key=final_cache_key,
             canonical_url=new_canonical_url,
             display_name=new_display_name,
@@ -267,8 +328,7 @@ def _run_worker(task_id: str) -> None:
         if not force_refresh and final_cache_key and final_cache_key != cache_key:
             upgraded_entry = get_cached_analysis(final_cache_key, mode)
             if upgraded_entry:
-                _update_task(
-                    task_id,
+                _flush(
                     status="done",
                     progress=100,
                     message="分析完成（來自升級後快取）",
@@ -277,12 +337,10 @@ def _run_worker(task_id: str) -> None:
                 return
 
         # 6) mock LLM 分析
-        _update_task(task_id, progress=60, message="分析評論中（mock LLM）")
+        _flush(progress=60, message="分析評論中（mock LLM）")
         time.sleep(2)
 
-        sample_reviews = [
-            (r.get("text") or r.get("reviewText") or "")[:80] for r in reviews[:3]
-        ]
+        sample_reviews = [_short_review_text(r) for r in reviews[:3]]
 
         result_obj = {
             "mock": True,
@@ -292,7 +350,7 @@ def _run_worker(task_id: str) -> None:
             "sample_reviews": sample_reviews,
         }
 
-        _update_task(task_id, progress=80, message="寫入快取中")
+        pending.update(progress=80, message="寫入快取中")
         set_cached_analysis(
             final_cache_key or cache_key,
             mode,
@@ -302,8 +360,7 @@ def _run_worker(task_id: str) -> None:
         )
 
         # 7) 完成
-        _update_task(
-            task_id,
+        _flush(
             status="done",
             progress=100,
             message="分析完成",
@@ -311,8 +368,7 @@ def _run_worker(task_id: str) -> None:
         )
 
     except Exception as e:
-        _update_task(
-            task_id,
+        _flush(
             status="error",
             message="分析過程中發生錯誤",
             error=str(e),
@@ -320,12 +376,8 @@ def _run_worker(task_id: str) -> None:
 
     finally:
         # 任務結束（無論成功或失敗）都要解除 dedupe mapping
-        with _lock:
-            keys_to_delete = [
-                dk for dk, tid in _running_by_dedupe_key.items() if tid == task_id
-            ]
-            for dk in keys_to_delete:
-                _running_by_dedupe_key.pop(dk, None)
+        with _dedupe_lock:
+            _unmap_dedupe_keys({task_id})
 
 
 __all__ = [
@@ -1,17 +1,28 @@
 import re
+import functools
 import hashlib
 import urllib.parse
-from typing import Optional, Dict, Any
-
-
-GOOGLE_DOMAINS = (
-    "google.com",
-    "google.com.tw",
-    "google.com.hk",
-    "google.com.jp",
-    "google.co",
+from typing import Optional, Dict, Any, NamedTuple, Tuple
+
+
+# netloc 分類，一次 fullmatch 完成（輸入需已小寫）：
+#   google     — maps.google.* 或 google 的各國網域及其子網域
+#                （google.de、www.google.co.uk、www.google.com.au ...）
+#   maps_short — maps.app.goo.gl 短網址（仍可能帶 cid 等參數）
+#   short      — goo.gl 短網址
+# 只看主機名稱：前面的 user@ 與後面的 :port 都略過。
+_HOST_KIND_RE = re.compile(
+    r"(?:.*@)?(?:"
+    r"(?P<google>maps\.google\.[^:@]+|(?:[^:@]*\.)?google\.(?:com?\.)?[a-z]{2,3})"
+    r"|(?P<maps_short>maps\.app\.goo\.gl)"
+    r"|(?P<short>goo\.gl)"
+    r")(?::[^@]*)?",
+    re.DOTALL,
 )
 
+# 實際流量中最常見的幾個 netloc：完全相同時一次 frozenset 查詢即可判定
+_COMMON_HOSTS = frozenset({"www.google.com", "maps.google.com", "google.com", "www.google.com.tw"})
+
 # Query 參數白名單：其餘會被當作追蹤參數移除
 ALLOWED_QUERY_KEYS = {
     "cid",
@@ -23,30 +34,109 @@ ALLOWED_QUERY_KEYS = {
     "gl",
 }
 
+# 常見追蹤 / 廣告參數（小寫比對）
+_TRACKING_KEYS = frozenset({"g_st", "fbclid", "gclid", "mc_id", "mc_eid"})
+
+# 白名單先扣掉追蹤參數（utm_* 與 _TRACKING_KEYS）後預先算好：
+# 過濾每個 query key 只需一次 frozenset 查詢，不必逐一 .lower() / startswith
+_KEEP_QUERY_KEYS = frozenset(
+    k for k in ALLOWED_QUERY_KEYS if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_KEYS
+)
+
+# canonicalize / normalize_input_to_canonical 的結果快取筆數（純函式，同一網址常被重複查詢）
+_NORMALIZE_CACHE_SIZE = 4096
+
+
+class _MapsComponents(NamedTuple):
+    place_id: Optional[str]
+    cid: Optional[str]
+    display_name: Optional[str]
+
+
+class _Canonical(NamedTuple):
+    canonical_url: str
+    cache_key: str
+    display_name: str
+    place_id: Optional[str]
+    cid: Optional[str]
+
+
+class _Normalized(NamedTuple):
+    canonical_url: str
+    cache_key: str
+    display_name: str
+    place_id: Optional[str]
+    cid: Optional[str]
+    input_type: str
+    resolved_from: str
+
+
+_NO_COMPONENTS = _MapsComponents(None, None, None)
+
+# 粗略擷取 http/https URL，避免吃到結尾標點符號
+_URL_RE = re.compile(r"(https?://[^\s<>\"'）)]+)")
+# _URL_RE 字元類別中排除的非空白字元
+_URL_STOP_CHARS = ("<", ">", '"', "'", "）", ")")
+# URL 尾端常見標點
+_TRAILING_PUNCT = ")。).,，；;"
+
+
+def _is_bare_url(text: str) -> bool:
+    """text 是否整段就是一個 _URL_RE 會完整吃下的 http(s) 網址（只用 C 層級的字串操作判斷）。"""
+    if not text.startswith(("http://", "https://")):
+        return False
+    # "://" 之後至少要有一個字元，regex 才會在開頭匹配
+    if text.find("://") + 3 >= len(text):
+        return False
+    # 不含空白（str.split 與 regex 的 \s 同樣採 Unicode 空白定義）：
+    # 第一段就等於整段才代表中間與結尾都沒有空白
+    if len(text.split(None, 1)[0]) != len(text):
+        return False
+    for ch in _URL_STOP_CHARS:
+        if ch in text:
+            return False
+    return True
+
 
 def extract_first_url(text: str) -> Optional[str]:
     """從任意文字中提取第一個 http/https 開頭的 URL。"""
     if not text:
         return None
-    # 粗略擷取，避免吃到結尾標點符號
-    match = re.search(r"(https?://[^\s<>\"'）)]+)", text)
+    # 最常見的情況是整段就是貼上的網址：整段都不含 _URL_RE 的終止字元時，
+    # regex 的結果必然就是整段文字，直接略過 regex
+    if _is_bare_url(text):
+        return text.rstrip(_TRAILING_PUNCT) or None
+    # 先用 str.find（C 實作）找 "http"：純店名 / 關鍵字輸入直接返回，
+    # 有的話 regex 也從該位置開始掃，不必從頭逐字比對
+    start = text.find("http")
+    if start < 0:
+        return None
+    match = _URL_RE.search(text, start)
     if not match:
         return None
     url = match.group(1).strip()
-    # 去掉尾端常見標點
-    url = url.rstrip(")。).,，；;")
+    url = url.rstrip(_TRAILING_PUNCT)
     return url or None
 
 
+def _low(s: str) -> str:
+    """小寫化；網域通常本來就是小寫，這時直接回傳原字串，不另外配置新字串。"""
+    return s if s.islower() else s.lower()
+
+
+def _host_kind(netloc: str) -> Optional[str]:
+    """netloc 屬於哪一類："google" / "maps_short" / "short"，其他網域回傳 None。"""
+    if netloc in _COMMON_HOSTS:
+        return "google"
+    match = _HOST_KIND_RE.fullmatch(_low(netloc))
+    return match.lastgroup if match else None
+
+
 def _is_google_maps_domain(netloc: str) -> bool:
-    netloc = netloc.lower()
-    return (
-        "google.com" in netloc
-        or "google.com.tw" in netloc
-        or "google.com.hk" in netloc
-        or "google.co" in netloc
-        or netloc.startswith("maps.google.")
-    )
+    # 只比對主機名稱（見 _HOST_KIND_RE）：maps.google.* 開頭，或以 google.<cc>、
+    # google.co.<cc>、google.com.<cc> 結尾（含子網域，google 前須為網域邊界）；
+    # 子字串比對會誤收 notgoogle.com、evil-google.com.attacker.net 這類網址
+    return _host_kind(netloc) == "google"
 
 
 def clean_tracking_params(url: str) -> str:
@@ -56,101 +146,120 @@ def clean_tracking_params(url: str) -> str:
     except Exception:
         return url
 
-    query = urllib.parse.parse_qs(parsed.query, keep_blank_values=False)
-    cleaned = {}
-    for key, values in query.items():
-        k_lower = key.lower()
-        # 移除追蹤 / 廣告相關參數
-        if k_lower.startswith("utm_"):
-            continue
-        if k_lower in {"g_st", "fbclid", "gclid", "mc_id", "mc_eid"}:
-            continue
-        if key not in ALLOWED_QUERY_KEYS:
-            continue
-        cleaned[key] = values
-
-    new_query = urllib.parse.urlencode(cleaned, doseq=True)
-    parsed = parsed._replace(query=new_query)
+    parsed = parsed._replace(query=_clean_query(parsed.query))
     return urllib.parse.urlunparse(parsed)
 
 
+def _clean_query(query: str) -> str:
+    """clean_tracking_params 的核心：只處理 query 字串，供已 parse 過的呼叫端直接使用。"""
+    # parse_qsl 直接給 (key, value) 序列，單趟過濾即可，不必先組成 key -> list 的 dict
+    cleaned = [
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(query, keep_blank_values=False)
+        if key in _KEEP_QUERY_KEYS
+    ]
+    return urllib.parse.urlencode(cleaned)
+
+
 def parse_maps_components(url: str) -> Dict[str, Optional[str]]:
     """從 Google Maps URL 中盡量抽出 place_id、cid 與餐廳名稱。"""
-    result: Dict[str, Optional[str]] = {
-        "place_id": None,
-        "cid": None,
-        "display_name": None,
-    }
-
     try:
-        parsed = urllib.parse.urlparse(url)
+        return _parse_and_clean(url)[2]._asdict()
     except Exception:
-        return result
+        return _NO_COMPONENTS._asdict()
 
-    netloc = parsed.netloc.lower()
-    path = parsed.path or ""
-    query = urllib.parse.parse_qs(parsed.query)
 
-    # 只處理 Google Maps 網域
-    if not _is_google_maps_domain(netloc) and not netloc.startswith("maps.app.goo.gl"):
-        return result
+# _parse_and_clean 從 query 取值的 key（各取第一個非空值）
+_COMPONENT_QUERY_KEYS = frozenset({"cid", "q", "query_place_id"})
+
+
+def _parse_and_clean(url: str) -> Tuple[urllib.parse.ParseResult, bool, _MapsComponents]:
+    """
+    canonicalize / parse_maps_components 的共用核心：只 parse 一次、只走一趟 query。
+
+    回傳 (query 已移除追蹤參數的 ParseResult, 是否為 Google Maps 網域, _MapsComponents)；
+    同一趟 parse_qsl 裡同時組出清理後的 query 與 cid / q / query_place_id。
+    """
+    parsed = urllib.parse.urlparse(url)
+    host_kind = _host_kind(parsed.netloc)
+    is_google = host_kind == "google"
+
+    cleaned = []
+    first_values: Dict[str, str] = {}
+    for key, value in urllib.parse.parse_qsl(parsed.query, keep_blank_values=False):
+        if key in _KEEP_QUERY_KEYS:
+            cleaned.append((key, value))
+        if key in _COMPONENT_QUERY_KEYS and key not in first_values:
+            first_values[key] = value
+    parsed = parsed._replace(query=urllib.parse.urlencode(cleaned))
+
+    # 只處理 Google Maps 網域（含 maps.app.goo.gl 短網址）
+    if not is_google and host_kind != "maps_short":
+        return parsed, is_google, _NO_COMPONENTS
+
+    path = parsed.path or ""
 
     # 1) 從 query 直接找 cid / place_id
-    cid = query.get("cid", [None])[0]
-    if cid:
-        result["cid"] = cid
+    cid = first_values.get("cid") or None
 
     # 例如 /maps/place/?q=place_id:ChIJ...
-    q_param = query.get("q", [None])[0]
-    if q_param and isinstance(q_param, str) and q_param.startswith("place_id:"):
-        result["place_id"] = q_param.split("place_id:", 1)[1] or None
+    place_id = None
+    q_param = first_values.get("q")
+    if q_param and q_param.startswith("place_id:"):
+        place_id = q_param.partition("place_id:")[2] or None
 
     # 或 query_place_id
-    qp = query.get("query_place_id", [None])[0]
+    qp = first_values.get("query_place_id")
     if qp:
-        result["place_id"] = qp
-
-    if not result["place_id"]:
-        # 嘗試從 path 解析 place_id（少見，但保守處理）
-        # /maps/place/...?q=place_id:XXX 已在上面處理
-        pass
+        place_id = qp
 
     # 2) 從 path 抽 display_name
-    segments = [s for s in path.split("/") if s]
-    # 典型：/maps/place/<NAME>/...
-    try:
+    # 典型：/maps/place/<NAME>/...，直接 partition 取 <NAME>，不必切開整條 path
+    display_name = None
+    encoded_name = None
+    if path.startswith("/maps/place/"):
+        encoded_name = path[len("/maps/place/"):].partition("/")[0]
+    if not encoded_name:
+        # 其他寫法（例如連續的 //）才切開整條 path、略過空段
+        segments = [s for s in path.split("/") if s]
         if len(segments) >= 3 and segments[0] == "maps" and segments[1] == "place":
             encoded_name = segments[2]
-            display_name = urllib.parse.unquote(encoded_name)
-            if display_name:
-                result["display_name"] = display_name
+    try:
+        if encoded_name:
+            display_name = urllib.parse.unquote(encoded_name) or None
     except Exception:
         pass
 
-    return result
+    return parsed, is_google, _MapsComponents(place_id, cid, display_name)
+
+
+def _hash16(s: str) -> str:
+    """
+    快取 key 用的 16 個 hex 字元摘要（64-bit blake2b）。
+    只用來分桶、不涉及安全性，usedforsecurity=False 讓 FIPS 環境也不會擋下。
+    """
+    return hashlib.blake2b(s.encode("utf-8"), digest_size=8, usedforsecurity=False).hexdigest()
 
 
 def canonicalize(url: str) -> Dict[str, Any]:
     """將任意 Google Maps URL 正規化成穩定的 canonical_url + 基本資訊。"""
-    cleaned_url = clean_tracking_params(url)
-    components = parse_maps_components(cleaned_url)
+    # 快取內存的是不可變的 NamedTuple，每次回傳新的 dict，呼叫端可自由修改
+    return _canonicalize_cached(url)._asdict()
 
-    place_id = components.get("place_id")
-    cid = components.get("cid")
-    display_name = components.get("display_name") or ""
 
-    try:
-        parsed = urllib.parse.urlparse(cleaned_url)
-    except Exception:
-        parsed = urllib.parse.urlparse(url)
+@functools.lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
+def _canonicalize_cached(url: str) -> _Canonical:
+    parsed, is_google, components = _parse_and_clean(url)
+    place_id = components.place_id
+    cid = components.cid
+    display_name = components.display_name or ""
 
     # 對於 Google Maps 網域，統一成 google.com 以提高快取命中率；
     # 對於 maps.app.goo.gl 等短網址，則保留原本網域，讓下游自行跟隨轉址。
-    if _is_google_maps_domain(parsed.netloc):
+    if is_google:
         base_netloc = "www.google.com"
     else:
         base_netloc = parsed.netloc
-    path = parsed.path or "/maps"
 
     # 建立 canonical_url
     if place_id:
@@ -158,18 +267,25 @@ def canonicalize(url: str) -> Dict[str, Any]:
     elif cid:
         canonical_url = f"https://maps.google.com/?cid={cid}&t=m"
     else:
-        # 沒有 place_id / cid，就用清理後的 /maps... URL
-        # 仍然移除多餘 query，只保留 ALLOWED_QUERY_KEYS
-        safe_url = clean_tracking_params(cleaned_url)
-        parsed2 = urllib.parse.urlparse(safe_url)
+        # 沒有 place_id / cid，就用清理後的 /maps... URL（query 已只剩 ALLOWED_QUERY_KEYS）
         # 若是 Google Maps 網域且不是 /maps 路徑，就強制補上 /maps；
         # 對 maps.app.goo.gl 等短網址則維持原始路徑，避免丟失短網址代碼。
-        if _is_google_maps_domain(parsed2.netloc):
-            if not parsed2.path.startswith("/maps"):
-                parsed2 = parsed2._replace(path="/maps")
-        canonical_url = urllib.parse.urlunparse(
-            ("https", base_netloc, parsed2.path, "", parsed2.query, "")
-        )
+        maps_path = parsed.path
+        if is_google:
+            if not maps_path.startswith("/maps"):
+                maps_path = "/maps"
+        if not base_netloc and maps_path.startswith("//"):
+            # 沒有網域又以 // 開頭的怪網址：交給 urlunparse 處理（它不會再補一次 //）
+            canonical_url = urllib.parse.urlunparse(
+                ("https", base_netloc, maps_path, "", parsed.query, "")
+            )
+        else:
+            # 形狀固定為 https://<netloc><path>[?<query>]，直接組字串，省去 urlunparse 的分支
+            if maps_path and maps_path[0] != "/":
+                maps_path = "/" + maps_path
+            canonical_url = f"https://{base_netloc}{maps_path}"
+            if parsed.query:
+                canonical_url = f"{canonical_url}?{parsed.query}"
 
     # 建立快取 key：place_id > cid > url_hash
     if place_id:
@@ -177,16 +293,9 @@ def canonicalize(url: str) -> Dict[str, Any]:
     elif cid:
         cache_key = f"cid:{cid}"
     else:
-        h = hashlib.sha256(canonical_url.encode("utf-8")).hexdigest()[:16]
-        cache_key = f"url:{h}"
-
-    return {
-        "canonical_url": canonical_url,
-        "cache_key": cache_key,
-        "display_name": display_name,
-        "place_id": place_id,
-        "cid": cid,
-    }
+        cache_key = f"url:{_hash16(canonical_url)}"
+
+    return _Canonical(canonical_url, cache_key, display_name, place_id, cid)
 
 
 def normalize_input_to_canonical(raw_text: str) -> Dict[str, Any]:
@@ -204,42 +313,45 @@ def normalize_input_to_canonical(raw_text: str) -> Dict[str, Any]:
     }
     """
     text = (raw_text or "").strip()
+    return _normalize_cached(text)._asdict()
+
 
+@functools.lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
+def _normalize_cached(text: str) -> _Normalized:
     # 1) 先嘗試從文字中抽出 URL
     url = extract_first_url(text)
     if url:
-        # 判斷是否短網址（實際 HTTP 解析會在別的 service 裡進行）
-        parsed = urllib.parse.urlparse(url)
-        netloc = parsed.netloc.lower()
-        is_short = netloc.startswith("maps.app.goo.gl") or netloc.startswith("goo.gl")
-        norm = canonicalize(url)
-        norm.update(
-            {
-                "input_type": "url",
-                "resolved_from": "short_url" if is_short else "long_url",
-            }
-        )
-        if not norm.get("display_name"):
+        # 判斷是否短網址（實際 HTTP 解析會在別的 service 裡進行）；
+        # 只需要 netloc，urlsplit 即可，不必像 urlparse 再掃一次 ;params
+        is_short = _host_kind(urllib.parse.urlsplit(url).netloc) in ("maps_short", "short")
+        norm = _canonicalize_cached(url)
+        return _Normalized(
+            canonical_url=norm.canonical_url,
+            cache_key=norm.cache_key,
             # 若 URL 中沒有餐廳名稱，就用原始文字作為 display_name 提示
-            norm["display_name"] = text
-        return norm
+            display_name=norm.display_name or text,
+            place_id=norm.place_id,
+            cid=norm.cid,
+            input_type="url",
+            resolved_from="short_url" if is_short else "long_url",
+        )
 
     # 2) 沒有 URL，視為使用者輸入關鍵字 / 店名，先組成 search URL
     search_query = text
-    encoded = urllib.parse.quote(search_query)
+    # 等同 quote(search_query)，但直接給 UTF-8 bytes，略過 quote 內部的 str 判斷與編碼分派
+    encoded = urllib.parse.quote_from_bytes(search_query.encode("utf-8"))
     search_url = f"https://www.google.com/maps/search/{encoded}"
-    h = hashlib.sha256(search_url.encode("utf-8")).hexdigest()[:16]
-    cache_key = f"search_url:{h}"
-
-    return {
-        "canonical_url": search_url,
-        "cache_key": cache_key,
-        "display_name": search_query,
-        "input_type": "search",
-        "resolved_from": "search_text",
-        "place_id": None,
-        "cid": None,
-    }
+    cache_key = f"search_url:{_hash16(search_url)}"
+
+    return _Normalized(
+        canonical_url=search_url,
+        cache_key=cache_key,
+        display_name=search_query,
+        place_id=None,
+        cid=None,
+        input_type="search",
+        resolved_from="search_text",
+    )
 
 
 __all__ = [
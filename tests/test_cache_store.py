@@ -0,0 +1,45 @@
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from services.cache_store import _utc_now_iso_ms
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _new_format(dt):
+    ns = (dt - _EPOCH) // timedelta(microseconds=1) * 1000
+    with mock.patch("services.cache_store.time.time_ns", return_value=ns):
+        return _utc_now_iso_ms()
+
+
+class UtcNowIsoMsTest(unittest.TestCase):
+    def test_matches_isoformat_and_epoch_ms(self):
+        dt = datetime(2026, 3, 4, 5, 6, 7, 890123, tzinfo=timezone.utc)
+        self.assertEqual(_new_format(dt), (dt.isoformat(timespec="microseconds"), 1772600767890))
+
+    def test_whole_second_keeps_fraction(self):
+        dt = datetime(2026, 3, 4, 5, 6, 7, tzinfo=timezone.utc)
+        self.assertEqual(_new_format(dt)[0], "2026-03-04T05:06:07.000000+00:00")
+
+    def test_text_order_matches_time_order_across_formats(self):
+        # Old writers used datetime.isoformat(), which drops the fraction when microsecond == 0.
+        rng = random.Random(0)
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        stamps = []
+        for _ in range(2000):
+            dt = base + timedelta(seconds=rng.randrange(10**8))
+            if rng.random() < 0.5:
+                dt += timedelta(microseconds=rng.randrange(10**6))
+            stamps.append(dt)
+            stamps.append(dt + timedelta(microseconds=1))
+        texts = [
+            (dt.isoformat() if i % 2 else _new_format(dt)[0], dt) for i, dt in enumerate(stamps)
+        ]
+        by_text = [dt for _, dt in sorted(texts, key=lambda t: t[0])]
+        self.assertEqual(by_text, sorted(stamps))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from services.place_store import (
+    _to_int,
+    batch_catalog_updates,
+    init_place_db,
+    list_catalog_places,
+    upsert_catalog_place,
+)
+
+# The upsert do_migration.py runs: it writes last_seen_at but not last_seen_at_ms.
+_SQL_SCRIPT_UPSERT_CATALOG = """
+INSERT INTO place_catalog (tag, canonical_url, discovered_at, last_seen_at)
+VALUES (?, ?, ?, ?)
+ON CONFLICT(tag, canonical_url) DO UPDATE SET last_seen_at = excluded.last_seen_at
+"""
+
+
+class ToIntTest(unittest.TestCase):
+    def test_integers(self):
+        self.assertEqual(_to_int(5), 5)
+        self.assertEqual(_to_int(" -3 "), -3)
+        self.assertEqual(_to_int("1_000"), 1000)
+        self.assertEqual(_to_int("9_007_199_254_740_993"), 9007199254740993)
+
+    def test_non_integer_strings_are_rejected(self):
+        for value in ("4.5", "12.0", "1e3", "", "n/a", "inf"):
+            with self.subTest(value=value):
+                self.assertIsNone(_to_int(value))
+
+    def test_missing(self):
+        self.assertIsNone(_to_int(None))
+
+
+class CatalogSortKeyTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_path = os.path.join(tmp.name, "places.db")
+        init_place_db(self.db_path)
+
+    def _script_upsert(self, canonical_url, seen_at):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(_SQL_SCRIPT_UPSERT_CATALOG, ("t", canonical_url, seen_at, seen_at))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _urls(self):
+        return [row["canonical_url"] for row in list_catalog_places(tag="t", db_path=self.db_path)]
+
+    def test_script_reseen_row_sorts_by_new_last_seen_at(self):
+        upsert_catalog_place(tag="t", canonical_url="app", db_path=self.db_path)
+        self._script_upsert("script", "2020-01-01T00:00:00+00:00")
+        self.assertEqual(self._urls(), ["app", "script"])
+
+        self._script_upsert("script", "2030-01-01T00:00:00+00:00")
+        self.assertEqual(self._urls(), ["script", "app"])
+
+    def test_init_repairs_rows_written_without_triggers(self):
+        upsert_catalog_place(tag="t", canonical_url="app", db_path=self.db_path)
+        self._script_upsert("script", "2020-01-01T00:00:00+00:00")
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("DROP TRIGGER trg_pc_ms_upd")
+            conn.execute(
+                "UPDATE place_catalog SET last_seen_at = '2030-01-01T00:00:00+00:00' "
+                "WHERE canonical_url = 'script'"
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        self.assertEqual(self._urls(), ["app", "script"])
+
+        init_place_db(self.db_path)
+        self.assertEqual(self._urls(), ["script", "app"])
+
+
+class BatchCatalogUpdatesTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_path = os.path.join(tmp.name, "places.db")
+        init_place_db(self.db_path)
+        for url in ("a", "b", "c"):
+            upsert_catalog_place(tag="t", canonical_url=url, db_path=self.db_path)
+
+    def _statuses(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT canonical_url, last_analyze_status FROM place_catalog ORDER BY canonical_url"
+            ).fetchall()
+        finally:
+            conn.close()
+        return dict(rows)
+
+    def test_updates_commit_together(self):
+        with batch_catalog_updates(self.db_path) as batch:
+            batch.update("t", "a", "ok")
+            batch.update("t", "b", "error", "boom")
+            self.assertTrue(batch._conn.in_transaction)
+            # Another connection sees nothing until the block commits.
+            self.assertEqual(self._statuses(), {"a": None, "b": None, "c": None})
+            batch.update("t", "c", "ok")
+        self.assertEqual(self._statuses(), {"a": "ok", "b": "error", "c": "ok"})
+
+    def test_exception_rolls_back_every_update(self):
+        with self.assertRaises(RuntimeError):
+            with batch_catalog_updates(self.db_path) as batch:
+                batch.update("t", "a", "ok")
+                batch.update("t", "b", "ok")
+                raise RuntimeError("stop")
+        self.assertEqual(self._statuses(), {"a": None, "b": None, "c": None})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from services.url_normalizer import _host_kind, canonicalize
+
+
+def _old_is_google(netloc):
+    n = netloc.lower()
+    return (
+        "google.com" in n
+        or "google.com.tw" in n
+        or "google.com.hk" in n
+        or "google.co" in n
+        or n.startswith("maps.google.")
+    )
+
+
+class CanonicalizeGoogleHostsTest(unittest.TestCase):
+    def test_maps_google_cctld_cid(self):
+        result = canonicalize("https://maps.google.de/?cid=123")
+        self.assertEqual(result["cache_key"], "cid:123")
+        self.assertEqual(result["cid"], "123")
+
+    def test_co_cctld_place_id_query(self):
+        result = canonicalize("https://www.google.co.uk/maps?q=place_id:ChIJabc123")
+        self.assertEqual(result["cache_key"], "place_id:ChIJabc123")
+        self.assertEqual(result["place_id"], "ChIJabc123")
+
+    def test_com_cctld_display_name(self):
+        result = canonicalize("https://www.google.com.au/maps/place/Foo/")
+        self.assertEqual(result["display_name"], "Foo")
+        self.assertTrue(result["cache_key"].startswith("url:"))
+
+    def test_lookalike_host_is_not_google(self):
+        result = canonicalize("https://notgoogle.com/maps/place/Foo/")
+        self.assertEqual(result["display_name"], "")
+
+
+class HostKindTest(unittest.TestCase):
+    def test_agrees_with_substring_predicate_on_cctld_hosts(self):
+        hosts = [
+            "www.google.com",
+            "google.com.tw",
+            "maps.google.com.hk",
+            "www.google.co.uk",
+            "google.co.jp",
+            "www.google.com.au",
+            "www.google.com.br",
+            "maps.google.de",
+            "maps.google.fr",
+            "WWW.GOOGLE.CO.IN",
+            "www.google.co.uk:443",
+        ]
+        for host in hosts:
+            with self.subTest(host=host):
+                self.assertEqual(_host_kind(host) == "google", _old_is_google(host))
+                self.assertEqual(_host_kind(host), "google")
+
+    def test_short_hosts(self):
+        self.assertEqual(_host_kind("maps.app.goo.gl"), "maps_short")
+        self.assertEqual(_host_kind("goo.gl"), "short")
+        self.assertIsNone(_host_kind("example.com"))
+
+
+if __name__ == "__main__":
+    unittest.main()
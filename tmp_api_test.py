@@ -2,36 +2,39 @@ import json
 
 import requests
 
+# Request bodies are fixed, so they are encoded once up front and sent as raw bytes.
+_JSON_HEADERS = {"Content-Type": "application/json"}
+_SEARCH_PLACES_BODY = json.dumps({"query": "鼎泰豐", "limit": 3}).encode("utf-8")
+_MAP_SEARCH_BODY = json.dumps({"query": "台北市 餐廳", "limit": 5}).encode("utf-8")
+
+
+def _post_and_print(session: requests.Session, url: str, body: bytes) -> None:
+    resp = session.post(url, data=body, headers=_JSON_HEADERS, timeout=30)
+    print("status:", resp.status_code)
+    try:
+        print("json:", json.dumps(json.loads(resp.content), ensure_ascii=False, indent=2))
+    except Exception:
+        print("text:", resp.text[:500])
+
 
 def main():
     """Simple local test script for /api/search_places and /api/map_search."""
     base = "http://127.0.0.1:5000"
 
-    print("=== POST /api/search_places ===")
-    try:
-        body = {"query": "鼎泰豐", "limit": 3}
-        resp = requests.post(f"{base}/api/search_places", json=body, timeout=30)
-        print("status:", resp.status_code)
+    # One session for both calls: the second request reuses the kept-alive connection.
+    with requests.Session() as session:
+        print("=== POST /api/search_places ===")
         try:
-            print("json:", json.dumps(resp.json(), ensure_ascii=False, indent=2))
-        except Exception:
-            print("text:", resp.text[:500])
-    except Exception as e:
-        print("ERROR calling /api/search_places:", repr(e))
+            _post_and_print(session, f"{base}/api/search_places", _SEARCH_PLACES_BODY)
+        except Exception as e:
+            print("ERROR calling /api/search_places:", repr(e))
 
-    print("\n=== POST /api/map_search ===")
-    try:
-        body = {"query": "台北市 餐廳", "limit": 5}
-        resp = requests.post(f"{base}/api/map_search", json=body, timeout=30)
-        print("status:", resp.status_code)
+        print("\n=== POST /api/map_search ===")
         try:
-            print("json:", json.dumps(resp.json(), ensure_ascii=False, indent=2))
-        except Exception:
-            print("text:", resp.text[:500])
-    except Exception as e:
-        print("ERROR calling /api/map_search:", repr(e))
+            _post_and_print(session, f"{base}/api/map_search", _MAP_SEARCH_BODY)
+        except Exception as e:
+            print("ERROR calling /api/map_search:", repr(e))
 
 
 if __name__ == "__main__":
     main()
-